@@ -3,137 +3,321 @@ Batch PDF Processor
 Handles processing multiple PDFs and combining into single Excel file.
 """
 
+import os
+import re
 import asyncio
+import fnmatch
+import multiprocessing
 import zipfile
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
-from typing import List, Dict, Any, Callable
+from typing import List, Dict, Any, Callable, Optional
 from .str_extractor import STRExtractor
-from .config.constants import STRING_COLUMN_PATTERNS, EXCEL_SHEET_NAME
+from .utils.xlsx_writer import write_xlsx
+from .config.constants import (
+    STRING_COLUMN_PATTERNS, EXCEL_SHEET_NAME, ZIP_COPY_BUFFER_SIZE, ZIP_EXTRACT_WORKERS,
+    MINIMAL_COLUMN_SOURCES
+)
+
+
+# Matches column names that must be written as text (see STRING_COLUMN_PATTERNS)
+_STRING_COLUMN_RE = re.compile('|'.join(map(re.escape, STRING_COLUMN_PATTERNS)))
+
+# Characters ZipFile.extract replaces with '_' in member names on Windows
+_WINDOWS_ILLEGAL_NAME_CHARS = str.maketrans(':<>"|?*', '_______')
+
+# Shared process pool for CPU-bound PDF extraction (created on first use)
+_PROCESS_POOL: Optional[ProcessPoolExecutor] = None
+
+# Threads for ZIP decompression (zlib releases the GIL)
+_ZIP_THREAD_POOL = ThreadPoolExecutor(max_workers=ZIP_EXTRACT_WORKERS, thread_name_prefix='zip-extract')
+
+# Process-wide extractor, shared by every BatchProcessor and pool task
+_extractor_singleton: Optional[STRExtractor] = None
+
+
+def get_extractor() -> STRExtractor:
+    """Return the process-wide STRExtractor, creating it on first use."""
+    global _extractor_singleton
+    if _extractor_singleton is None:
+        _extractor_singleton = STRExtractor()
+    return _extractor_singleton
+
+
+def _init_worker():
+    """Warm a pool worker by building its extractor before the first task."""
+    get_extractor()
+
+
+def _process_pool_size() -> int:
+    """Pool size for this server process (set by the multi-worker entrypoint in main)."""
+    return max(1, int(os.getenv("EXTRACT_POOL_SIZE", os.cpu_count() or 1)))
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """Return the shared extraction process pool, creating it if needed."""
+    global _PROCESS_POOL
+    if _PROCESS_POOL is None:
+        # Spawn rather than fork: the server already runs ZIP and upload threads,
+        # and _init_worker warms each fresh worker anyway
+        _PROCESS_POOL = ProcessPoolExecutor(
+            max_workers=_process_pool_size(), mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker
+        )
+    return _PROCESS_POOL
+
+
+def _reset_process_pool():
+    """Discard a broken process pool so the next batch starts a fresh one."""
+    global _PROCESS_POOL
+    if _PROCESS_POOL is not None:
+        _PROCESS_POOL.shutdown(wait=False, cancel_futures=True)
+        _PROCESS_POOL = None
+
+
+def _extract_worker(pdf_path: str) -> Dict[str, Any]:
+    """Extract a single PDF inside a pool worker (one extractor per process)."""
+    return get_extractor().extract_from_pdf(pdf_path)
+
+
+def _combine_worker(all_data: List[Dict[str, Any]], outputs: Dict[str, str]) -> int:
+    """Build and write the Excel files for each mode inside a pool worker."""
+    return BatchProcessor().combine_to_excels(all_data, outputs)
+
+
+def _member_output_path(extract_path: Path, member_name: str) -> Path:
+    """Map a ZIP member name to a path inside extract_path.
+
+    Mirrors ZipFile.extract: drive letters, empty, '.' and '..' components
+    are dropped so entries can never escape the extraction directory, and on
+    Windows characters invalid in file names are replaced as ZipFile does.
+    """
+    arcname = member_name.replace('/', os.sep)
+    if os.altsep:
+        arcname = arcname.replace(os.altsep, os.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = [part for part in arcname.split(os.sep) if part not in ('', os.curdir, os.pardir)]
+
+    if os.sep == '\\':
+        # Same as ZipFile._sanitize_windows_name
+        parts = [part.translate(_WINDOWS_ILLEGAL_NAME_CHARS).rstrip('.') for part in parts]
+        parts = [part for part in parts if part]
+
+    return extract_path.joinpath(*parts)
+
+
+def _extract_zip_member(zip_ref: zipfile.ZipFile, member_name: str,
+                        extract_path: Path, buffer: bytearray) -> str:
+    """Stream one ZIP entry to disk through a reusable copy buffer."""
+    out_path = _member_output_path(extract_path, member_name)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    view = memoryview(buffer)
+    with zip_ref.open(member_name) as src, open(out_path, 'wb', buffering=0) as dst:
+        while n := src.readinto(buffer):
+            # A raw write may be partial, so keep writing until the chunk is out
+            written = 0
+            while written < n:
+                written += dst.write(view[written:n])
+
+    return str(out_path)
+
+
+def _extract_zip_members(zip_path: str, member_names: List[str], extract_path: Path):
+    """Extract a share of the ZIP entries with this worker's own ZipFile handle."""
+    buffer = bytearray(ZIP_COPY_BUFFER_SIZE)
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        for member_name in member_names:
+            _extract_zip_member(zip_ref, member_name, extract_path, buffer)
 
 
 class BatchProcessor:
     def __init__(self):
-        self.extractor = STRExtractor()
+        self.extractor = get_extractor()
 
     async def extract_zip(self, zip_path: str, extract_dir: str) -> List[str]:
         """Extract PDFs from ZIP file."""
-        pdf_files = []
         extract_path = Path(extract_dir)
         extract_path.mkdir(parents=True, exist_ok=True)
 
         with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            for file_info in zip_ref.namelist():
-                if file_info.lower().endswith('.pdf'):
-                    zip_ref.extract(file_info, extract_dir)
-                    pdf_files.append(str(extract_path / file_info))
+            # One compiled case-insensitive pattern instead of lower() per entry
+            member_names = fnmatch.filter(zip_ref.namelist(), '*.[Pp][Dd][Ff]')
+
+        # Distinct members can map to the same file (e.g. '../a.pdf' and 'a.pdf'),
+        # so keep one member per output path or two workers would write it at once.
+        # The last member wins, as with sequential extraction
+        members_by_path = {}
+        for name in member_names:
+            members_by_path[_member_output_path(extract_path, name)] = name
+
+        if not members_by_path:
+            return []
 
-        return pdf_files
+        pdf_names = list(members_by_path.values())
+
+        # Split entries across workers; each opens the ZIP independently so
+        # decompression runs in parallel without sharing a file handle
+        workers = min(ZIP_EXTRACT_WORKERS, len(pdf_names))
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(
+                _ZIP_THREAD_POOL, _extract_zip_members, zip_path, pdf_names[i::workers], extract_path
+            )
+            for i in range(workers)
+        ))
+
+        return [str(out_path) for out_path in members_by_path]
 
     async def process_pdfs(
         self,
         pdf_files: List[str],
-        progress_callback: Callable[[int, int, str, str], None] = None
+        progress_callback: Callable[[int, int, str, str, int], None] = None
     ) -> tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
         """Process multiple PDF files with progress tracking.
 
+        progress_callback gets (completed count, total, message, item status,
+        0-based input index of the file that just finished).
+
         Returns:
             Tuple of (all_data, failed_files) where failed_files contains error details
         """
-        all_data = []
-        failed_files = []
         total = len(pdf_files)
+        results: List[Optional[Dict[str, Any]]] = [None] * total
+        failures: List[tuple[int, Dict[str, str]]] = []
 
-        for idx, pdf_path in enumerate(pdf_files, 1):
-            pdf_name = Path(pdf_path).name
-
-            if progress_callback:
-                await progress_callback(idx, total, f"Processing {pdf_name}", "processing")
+        loop = asyncio.get_running_loop()
+        pool = _get_process_pool()
 
+        async def run_one(idx: int, pdf_path: str):
+            # Run blocking PDF extraction in the process pool to use all cores
             try:
-                # Run blocking PDF extraction in thread pool to avoid blocking event loop
-                data = await asyncio.to_thread(self.extractor.extract_from_pdf, pdf_path)
+                data = await loop.run_in_executor(pool, _extract_worker, pdf_path)
+                return idx, data, None
+            except Exception as e:
+                return idx, None, e
+
+        # Submit every PDF up front, then report progress as workers finish
+        jobs = [run_one(idx, pdf_path) for idx, pdf_path in enumerate(pdf_files, 1)]
+        pool_broken = False
+
+        # Results arrive out of order, so progress reports how many files are
+        # done; idx identifies the file that finished and keeps its output position
+        for completed, next_done in enumerate(asyncio.as_completed(jobs), 1):
+            idx, data, error = await next_done
+            pdf_name = Path(pdf_files[idx - 1]).name
+
+            if error is None:
                 data['_source_file'] = pdf_name
-                all_data.append(data)
+                results[idx - 1] = data
 
                 if progress_callback:
-                    await progress_callback(idx, total, f"Completed {pdf_name}", "success")
-            except Exception as e:
-                error_msg = str(e)
-                failed_files.append({
+                    await progress_callback(completed, total, f"Completed {pdf_name}", "success", idx - 1)
+            else:
+                error_msg = str(error)
+                failures.append((idx, {
                     'filename': pdf_name,
                     'error': error_msg
-                })
+                }))
+                pool_broken = pool_broken or isinstance(error, BrokenProcessPool)
 
                 if progress_callback:
-                    await progress_callback(idx, total, f"Failed: {pdf_name} - {error_msg}", "error")
+                    await progress_callback(completed, total, f"Failed: {pdf_name} - {error_msg}", "error", idx - 1)
                 # Continue processing other files
-                continue
+
+        if pool_broken:
+            _reset_process_pool()
+
+        # Keep output order identical to the input order
+        all_data = [data for data in results if data is not None]
+        failed_files = [failure for _, failure in sorted(failures, key=lambda f: f[0])]
 
         return all_data, failed_files
 
-    def combine_to_excel(self, all_data: List[Dict[str, Any]], output_path: str, mode: str = 'everything'):
-        """Combine all extracted data into single Excel file."""
-        rows = []
+    async def write_excels(self, all_data: List[Dict[str, Any]], outputs: Dict[str, str]) -> int:
+        """Run combine_to_excels in the process pool so the event loop stays free."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_process_pool(), _combine_worker, all_data, outputs)
 
-        for data in all_data:
-            # Use appropriate row method based on mode
-            if mode == 'minimal':
-                row = self.extractor.to_excel_row_minimal(data)
-            else:
-                row = self.extractor.to_excel_row(data)
+    def _build_dataframe(self, all_data: List[Dict[str, Any]],
+                         include_minimal_detail: bool = True) -> pd.DataFrame:
+        """Build the ordered, text-coerced "everything" DataFrame.
 
-            # Add source file column
-            row['source_file'] = data.get('_source_file', '')
-            rows.append(row)
+        'Minimal Detail' is only shown on the everything sheet, so callers
+        writing just the minimal sheet can skip building it.
+        """
+        # Build the DataFrame from contiguous columns without a row->column transpose
+        col_data = self.extractor.to_excel_columns(all_data, include_minimal_detail)
+
+        # Add source file column
+        if all_data:
+            col_data['source_file'] = [data.get('_source_file', '') for data in all_data]
 
         # Create DataFrame
-        df = pd.DataFrame(rows)
+        df = pd.DataFrame(col_data, copy=False)
 
-        # Reorder columns based on mode
+        # Order: pemohon_no_mykad, Card Number, Minimal Detail, Details, then other data columns, then document columns, then source_file
         all_columns = df.columns.tolist()
+        document_cols = [col for col in all_columns if col.startswith('document_')]
+        source_file_col = ['source_file'] if 'source_file' in all_columns else []
+
+        # Ensure pemohon_no_mykad, Card Number, Minimal Detail, and Details are first
+        first_cols = []
+        if 'pemohon_no_mykad' in all_columns:
+            first_cols.append('pemohon_no_mykad')
+        if 'Card Number' in all_columns:
+            first_cols.append('Card Number')
+        if 'Minimal Detail' in all_columns:
+            first_cols.append('Minimal Detail')
+        if 'Details' in all_columns:
+            first_cols.append('Details')
+
+        # Get remaining data columns (exclude document_, source_file, and first_cols)
+        data_cols = [col for col in all_columns
+                    if col not in document_cols
+                    and col != 'source_file'
+                    and col not in first_cols]
+
+        # Reorder: pemohon_no_mykad + Card Number + Minimal Detail + Details + other data columns + document columns + source_file
+        ordered_columns = first_cols + data_cols + document_cols + source_file_col
+        df = df.reindex(columns=ordered_columns, copy=False)
+
+        # Convert numeric-looking text columns to string to prevent Excel auto-formatting.
+        # The nullable string dtype keeps missing values as NA (not 'nan'), so one
+        # block assignment covers every matching column. Every minimal text column
+        # (IC, PH1, ...) is sourced from one of these, so this runs once for all modes
+        string_cols = [col for col in df.columns if _STRING_COLUMN_RE.search(col)]
+        if string_cols:
+            df[string_cols] = df[string_cols].astype('string').fillna('').replace('nan', '')
+
+        return df
+
+    def combine_to_excels(self, all_data: List[Dict[str, Any]], outputs: Dict[str, str]) -> int:
+        """Write one Excel file per mode from a single shared DataFrame.
+
+        Args:
+            all_data: Extracted records
+            outputs: Mapping of mode ('everything' or 'minimal') to output path
+        """
+        df = self._build_dataframe(all_data, include_minimal_detail='everything' in outputs)
+
+        for mode, output_path in outputs.items():
+            if mode == 'minimal':
+                # Minimal columns are a renamed projection of the full frame
+                frame = df.reindex(columns=list(MINIMAL_COLUMN_SOURCES.values()), copy=False)
+                frame.columns = list(MINIMAL_COLUMN_SOURCES)
+            else:
+                frame = df
 
-        if mode == 'minimal':
-            # For minimal mode: IC, Card Number, Details, then rest of columns
-            first_cols = ['IC', 'Card Number', 'Details']
-            other_cols = [col for col in all_columns if col not in first_cols]
-            ordered_columns = first_cols + other_cols
-        else:
-            # For everything mode: pemohon_no_mykad, Card Number, Minimal Detail, Details, then other data columns, then document columns, then source_file
-            document_cols = [col for col in all_columns if col.startswith('document_')]
-            source_file_col = ['source_file'] if 'source_file' in all_columns else []
-
-            # Ensure pemohon_no_mykad, Card Number, Minimal Detail, and Details are first
-            first_cols = []
-            if 'pemohon_no_mykad' in all_columns:
-                first_cols.append('pemohon_no_mykad')
-            if 'Card Number' in all_columns:
-                first_cols.append('Card Number')
-            if 'Minimal Detail' in all_columns:
-                first_cols.append('Minimal Detail')
-            if 'Details' in all_columns:
-                first_cols.append('Details')
-
-            # Get remaining data columns (exclude document_, source_file, and first_cols)
-            data_cols = [col for col in all_columns
-                        if col not in document_cols
-                        and col != 'source_file'
-                        and col not in first_cols]
-
-            # Reorder: pemohon_no_mykad + Card Number + Minimal Detail + Details + other data columns + document columns + source_file
-            ordered_columns = first_cols + data_cols + document_cols + source_file_col
-
-        df = df[ordered_columns]
-
-        # Convert numeric-looking text columns to string to prevent Excel auto-formatting
-        for col in df.columns:
-            # Check if column name matches any pattern
-            if any(pattern in col for pattern in STRING_COLUMN_PATTERNS):
-                # Convert to string and replace 'nan' with empty string
-                df[col] = df[col].fillna('').astype(str)
-                df[col] = df[col].replace('nan', '')
-
-        # Save to Excel
-        df.to_excel(output_path, sheet_name=EXCEL_SHEET_NAME, index=False, engine='openpyxl')
-
-        return len(rows)
\ No newline at end of file
+            # Save to Excel by streaming the sheet XML directly; missing values become empty cells
+            values = frame.astype(object).where(frame.notna(), None)
+            write_xlsx(output_path, EXCEL_SHEET_NAME, list(frame.columns),
+                       values.itertuples(index=False, name=None))
+
+        return len(all_data)
+
+    def combine_to_excel(self, all_data: List[Dict[str, Any]], output_path: str, mode: str = 'everything'):
+        """Combine all extracted data into single Excel file."""
+        return self.combine_to_excels(all_data, {mode: output_path})
@@ -8,13 +8,14 @@ V2_OFFSET_Y = 28.34
 
 # DPI Settings
 DEFAULT_DPI = 150
-BORDER_DETECTION_DPI = 150
+BORDER_DETECTION_DPI = 150  # Lower DPIs anti-alias thin (<=1pt) borders above BORDER_THRESHOLD_VALUE
 
-# Border Detection Parameters
+# Border Detection Parameters (pixel values are at BORDER_DETECTION_DPI)
 MIN_BORDER_OFFSET = 30  # pixels from edge
 BORDER_AREA_THRESHOLD = 0.8  # 80% of image area
 MAX_MARGIN_THRESHOLD = 0.10  # 10% of page size
 BORDER_THRESHOLD_VALUE = 50  # Binary threshold for black detection
+BORDER_LINE_COVERAGE = 0.6  # Fraction of a row/column that must be black to count as a border line
 
 # Extraction Tolerances
 TOLERANCE_DEFAULT = 5  # Default Y-axis tolerance in pixels
@@ -23,11 +24,12 @@ TOLERANCE_LABEL = 10  # Tolerance for label detection
 
 # Section Header Keywords
 SECTION_HEADERS = {
-    'maklumat_pemohon_header': ['MAKLUMAT', 'PEMOHON'],
-    'maklumat_pasangan_header': ['MAKLUMAT', 'PASANGAN'],
-    'maklumat_anak_header': ['MAKLUMAT', 'ANAK'],
-    'maklumat_waris_header': ['MAKLUMAT', 'WARIS']
+    'maklumat_pemohon_header': frozenset({'MAKLUMAT', 'PEMOHON'}),
+    'maklumat_pasangan_header': frozenset({'MAKLUMAT', 'PASANGAN'}),
+    'maklumat_anak_header': frozenset({'MAKLUMAT', 'ANAK'}),
+    'maklumat_waris_header': frozenset({'MAKLUMAT', 'WARIS'})
 }
+SECTION_HEADER_ALL = frozenset.union(*SECTION_HEADERS.values())
 
 # Search Ranges for Header Detection
 SEARCH_RANGE_DEFAULT = 50
@@ -70,6 +72,26 @@ STRING_COLUMN_PATTERNS = [
     'poskod', 'no_akaun', 'no_pengenalan'
 ]
 
+# Minimal Excel columns and the "everything" columns they are taken from
+MINIMAL_COLUMN_SOURCES = {
+    'IC': 'pemohon_no_mykad',
+    'Card Number': 'Card Number',
+    'Details': 'Details',
+    'NAME': 'pemohon_nama',
+    'PH1': 'pemohon_telefon_bimbit',
+    'PH2': 'pemohon_telefon_rumah',
+    'ADDRESS': 'pemohon_alamat',
+    'SPOUSE IC': 'pasangan_no_mykad',
+    'SPOUSE NAME': 'pasangan_nama',
+    'SPOUSE PH': 'pasangan_telefon',
+    'RELATION': 'waris_hubungan',
+    'REL-IC': 'waris_no_pengenalan',
+    'REL-NAME': 'waris_nama',
+    'REL-PH1': 'waris_telefon',
+    'EMAIL': 'pemohon_email',
+    'source_file': 'source_file',
+}
+
 # Gender Keywords
 GENDER_KEYWORDS = {
     'PEREMPUAN': 'PEREMPUAN',
@@ -80,6 +102,13 @@ GENDER_KEYWORDS = {
 DOCUMENT_TYPE = 'Sumbangan Tunai Rahmah (STR)'
 EXTRACTION_VERSION = 'v3.0-template-based'
 
+# ZIP Extraction
+ZIP_COPY_BUFFER_SIZE = 1024 * 1024  # 1 MiB copy buffer per extraction worker
+ZIP_EXTRACT_WORKERS = 16  # Max threads decompressing entries in parallel
+
+# Uploads
+UPLOAD_COPY_BUFFER_SIZE = 1024 * 1024  # 1 MiB chunks when streaming uploads to disk
+
 # Excel Sheet Name
 EXCEL_SHEET_NAME = 'STR_Data'
 
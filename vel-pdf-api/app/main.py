@@ -4,17 +4,22 @@ Handles PDF/ZIP uploads, processing, and Excel generation with WebSocket progres
 """
 
 import os
+import sys
+import json
 import uuid
+import asyncio
 import shutil
 import time
 from pathlib import Path
 from typing import List
+import uvicorn
 from fastapi import FastAPI, File, UploadFile, WebSocket, WebSocketDisconnect, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import FileResponse
 from dotenv import load_dotenv
 
 from .batch_processor import BatchProcessor
+from .config.constants import UPLOAD_COPY_BUFFER_SIZE
 from .models import UploadResponse, ProgressMessage
 
 load_dotenv()
@@ -47,6 +52,9 @@ OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", "outputs"))
 UPLOAD_DIR.mkdir(exist_ok=True)
 OUTPUT_DIR.mkdir(exist_ok=True)
 
+# PDF list written at upload time and read back by the progress socket
+SESSION_MANIFEST = "_manifest.json"
+
 # WebSocket connections manager
 class ConnectionManager:
     def __init__(self):
@@ -69,6 +77,9 @@ class ConnectionManager:
 
 manager = ConnectionManager()
 
+# Batch processor shared by every session (it holds no per-session state)
+_processor = BatchProcessor()
+
 
 @app.get("/health")
 async def health_check():
@@ -76,6 +87,33 @@ async def health_check():
     return {"status": "healthy", "service": "vel-pdf-api"}
 
 
+def _copy_upload(file: UploadFile, file_path: Path):
+    """Stream an uploaded file's spooled contents to disk in fixed-size chunks."""
+    file.file.seek(0)
+    with open(file_path, "wb") as buffer:
+        shutil.copyfileobj(file.file, buffer, UPLOAD_COPY_BUFFER_SIZE)
+
+
+async def save_upload(file: UploadFile, session_dir: Path, upload_index: int) -> List[str]:
+    """Save one upload and return the PDF paths it contributes."""
+    # Uploads are saved concurrently, so each gets its own directory and two
+    # files with the same name never write to one path at once
+    upload_dir = session_dir / str(upload_index)
+    upload_dir.mkdir(exist_ok=True)
+    file_path = upload_dir / file.filename
+
+    # Write in a thread so other uploads and WebSocket traffic keep running
+    await asyncio.to_thread(_copy_upload, file, file_path)
+
+    # Handle ZIP files (extracted per upload too, so overlapping member names can't clash)
+    if file.filename.lower().endswith('.zip'):
+        extract_dir = session_dir / "extracted" / str(upload_index)
+        return await _processor.extract_zip(str(file_path), str(extract_dir))
+    elif file.filename.lower().endswith('.pdf'):
+        return [str(file_path)]
+    return []
+
+
 @app.post("/api/upload", response_model=UploadResponse)
 async def upload_files(files: List[UploadFile] = File(...)):
     """Upload PDF or ZIP files for processing."""
@@ -83,23 +121,11 @@ async def upload_files(files: List[UploadFile] = File(...)):
     session_dir = UPLOAD_DIR / session_id
     session_dir.mkdir(parents=True, exist_ok=True)
 
-    pdf_files = []
-
-    for file in files:
-        file_path = session_dir / file.filename
+    results = await asyncio.gather(*(save_upload(file, session_dir, idx) for idx, file in enumerate(files)))
+    pdf_files = [pdf for saved in results for pdf in saved]
 
-        # Save uploaded file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-
-        # Handle ZIP files
-        if file.filename.lower().endswith('.zip'):
-            processor = BatchProcessor()
-            extracted_pdfs = await processor.extract_zip(str(file_path), str(session_dir / "extracted"))
-            pdf_files.extend(extracted_pdfs)
-        elif file.filename.lower().endswith('.pdf'):
-            pdf_files.append(str(file_path))
+    # Record the PDF list so the progress socket doesn't have to walk the tree
+    (session_dir / SESSION_MANIFEST).write_text(json.dumps(pdf_files))
 
     return UploadResponse(
         session_id=session_id,
@@ -125,10 +151,15 @@ async def websocket_progress(websocket: WebSocket, session_id: str, modes: str =
             })
             return
 
-        # Find all PDFs in session directory
-        pdf_files = list(session_dir.glob("*.pdf"))
-        pdf_files.extend(session_dir.glob("extracted/**/*.pdf"))
-        pdf_files = [str(f) for f in pdf_files]
+        # Use the PDF list recorded at upload, falling back to a scan for
+        # sessions uploaded before manifests existed
+        manifest_path = session_dir / SESSION_MANIFEST
+        if manifest_path.exists():
+            pdf_files = json.loads(manifest_path.read_text())
+        else:
+            pdf_files = list(session_dir.glob("*.pdf"))
+            pdf_files.extend(session_dir.glob("extracted/**/*.pdf"))
+            pdf_files = [str(f) for f in pdf_files]
 
         if not pdf_files:
             await websocket.send_json({
@@ -140,10 +171,9 @@ async def websocket_progress(websocket: WebSocket, session_id: str, modes: str =
             return
 
         # Process PDFs with progress callback
-        processor = BatchProcessor()
         start_time = time.time()
 
-        async def progress_callback(current: int, total: int, message: str, item_status: str):
+        async def progress_callback(current: int, total: int, message: str, item_status: str, file_index: int):
             elapsed = time.time() - start_time
             await manager.send_progress(session_id, {
                 "current": current,
@@ -151,22 +181,21 @@ async def websocket_progress(websocket: WebSocket, session_id: str, modes: str =
                 "status": "processing",
                 "message": message,
                 "item_status": item_status,
+                "file_index": file_index,
                 "elapsed_time": round(elapsed, 2)
             })
 
-        all_data, failed_files = await processor.process_pdfs(pdf_files, progress_callback)
+        all_data, failed_files = await _processor.process_pdfs(pdf_files, progress_callback)
 
         # Parse modes parameter (comma-separated)
         mode_list = [m.strip() for m in modes.split(',') if m.strip() in ['everything', 'minimal']]
         if not mode_list:
             mode_list = ['everything']
 
-        # Generate Excel files for each mode
-        generated_files = []
-        for mode in mode_list:
-            output_file = OUTPUT_DIR / f"{session_id}_{mode}.xlsx"
-            total_records = processor.combine_to_excel(all_data, str(output_file), mode=mode)
-            generated_files.append(f"{mode}.xlsx")
+        # Generate Excel files for every mode from one shared DataFrame
+        outputs = {mode: str(OUTPUT_DIR / f"{session_id}_{mode}.xlsx") for mode in mode_list}
+        total_records = await _processor.write_excels(all_data, outputs)
+        generated_files = [f"{mode}.xlsx" for mode in outputs]
 
         # Send completion message
         elapsed_time = time.time() - start_time
@@ -240,4 +269,27 @@ async def cleanup_session(session_id: str):
         if output_file.exists():
             output_file.unlink()
 
-    return {"message": "Session cleaned up successfully"}
\ No newline at end of file
+    return {"message": "Session cleaned up successfully"}
+
+
+if __name__ == "__main__":
+    import multiprocessing
+
+    # Required for the process pool when running as a frozen executable
+    multiprocessing.freeze_support()
+
+    # Every worker owns an extraction pool; workers inherit this environment, so
+    # each pool gets its share of the CPUs instead of all of them
+    workers = int(os.getenv("WORKERS", os.cpu_count() or 1))
+    os.environ.setdefault("EXTRACT_POOL_SIZE", str(max(1, (os.cpu_count() or 1) // workers)))
+
+    # Sessions live on disk, so the upload and progress requests of one session
+    # may be served by different workers; each WebSocket stays on its worker
+    uvicorn.run(
+        "app.main:app",
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=workers,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+    )
@@ -17,6 +17,8 @@ class ProgressMessage(BaseModel):
     total: int
     status: str
     message: str
+    item_status: Optional[str] = None
+    file_index: Optional[int] = None  # 0-based input position of the file this update is about
     elapsed_time: Optional[float] = None
 
 
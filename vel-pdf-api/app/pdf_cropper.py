@@ -5,55 +5,70 @@ Detects v2 format PDFs (with black border) without cropping
 
 import cv2
 import numpy as np
-import pdfplumber
+import pypdfium2 as pdfium
 from pathlib import Path
 from .config.constants import (
     MIN_BORDER_OFFSET, BORDER_AREA_THRESHOLD, MAX_MARGIN_THRESHOLD,
-    BORDER_THRESHOLD_VALUE, BORDER_DETECTION_DPI
+    BORDER_THRESHOLD_VALUE, BORDER_LINE_COVERAGE, BORDER_DETECTION_DPI
 )
 
 
 def detect_border(image_array):
     """
-    Detect black rectangular border in image using OpenCV contour detection
+    Detect black rectangular border in image using row/column projections
+
+    The border's four edges are the first/last rows and columns whose black
+    pixel count covers most of the page, so no contour extraction is needed.
 
     Args:
-        image_array: numpy array of the image (BGR format)
+        image_array: numpy array of the image (2D grayscale or BGR format)
 
     Returns:
         tuple: (x, y, width, height) of the inner content area, or None if no border detected
     """
-    # Convert to grayscale
-    gray = cv2.cvtColor(image_array, cv2.COLOR_BGR2GRAY)
+    # Convert to grayscale (grayscale renders are used as-is)
+    if image_array.ndim == 2:
+        gray = image_array
+    else:
+        gray = cv2.cvtColor(image_array, cv2.COLOR_BGR2GRAY)
+
+    img_height, img_width = gray.shape
+
+    # Early exit: a v2 border's left edge must cross the middle row somewhere
+    # between MIN_BORDER_OFFSET and the maximum margin, so that band needs a black pixel
+    margin_x = int(img_width * MAX_MARGIN_THRESHOLD)
+    if not (gray[img_height // 2, MIN_BORDER_OFFSET:margin_x + 1] <= BORDER_THRESHOLD_VALUE).any():
+        return None
 
-    # Apply binary threshold to detect black areas
     # Black border should be close to 0 (black)
-    _, binary = cv2.threshold(gray, BORDER_THRESHOLD_VALUE, 255, cv2.THRESH_BINARY_INV)
+    black = gray <= BORDER_THRESHOLD_VALUE
 
-    # Find contours
-    contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    # Rows/columns that are mostly black are candidate border lines
+    border_rows = np.count_nonzero(black, axis=1) > BORDER_LINE_COVERAGE * img_width
+    border_cols = np.count_nonzero(black, axis=0) > BORDER_LINE_COVERAGE * img_height
 
-    if not contours:
+    if not border_rows.any() or not border_cols.any():
         return None
 
-    # Find the largest contour (should be the border)
-    largest_contour = max(contours, key=cv2.contourArea)
-
-    # Get bounding rectangle of the largest contour
-    x, y, w, h = cv2.boundingRect(largest_contour)
+    # Outermost border lines on each side
+    y = int(np.argmax(border_rows))
+    bottom = img_height - 1 - int(np.argmax(border_rows[::-1]))
+    x = int(np.argmax(border_cols))
+    right = img_width - 1 - int(np.argmax(border_cols[::-1]))
+    w = right - x + 1
+    h = bottom - y + 1
 
     # Check if this is likely a border (should be near the edges and large)
-    img_height, img_width = gray.shape
-    contour_area = w * h
+    border_area = w * h
     image_area = img_width * img_height
 
     # Border should cover at least threshold % of the image
-    if contour_area < BORDER_AREA_THRESHOLD * image_area:
+    if border_area < BORDER_AREA_THRESHOLD * image_area:
         return None
 
     # IMPORTANT: Real black borders (v2 format) start significantly inside the page
     # False positives (v1 format) start at page edges (x≈5, y≈5)
-    # Real v2 border starts around x=64, y=64
+    # Real v2 border starts around x=59, y=59 (at 150 DPI)
     if x < MIN_BORDER_OFFSET or y < MIN_BORDER_OFFSET:
         # This is too close to the edge - likely a false positive (page edge detection)
         return None
@@ -63,14 +78,6 @@ def detect_border(image_array):
         y > img_height * MAX_MARGIN_THRESHOLD):
         return None
 
-    # Approximate polygon to check if it's rectangular
-    epsilon = 0.02 * cv2.arcLength(largest_contour, True)
-    approx = cv2.approxPolyDP(largest_contour, epsilon, True)
-
-    # Should have 4 corners (rectangle)
-    if len(approx) < 4 or len(approx) > 6:  # Allow some tolerance
-        return None
-
     # Return the bounding box coordinates
     return (x, y, w, h)
 
@@ -92,20 +99,22 @@ def detect_v2_border(input_pdf_path, dpi=BORDER_DETECTION_DPI):
         return False
 
     try:
-        # Convert first page to image for border detection using pdfplumber
-        with pdfplumber.open(str(input_path)) as pdf:
-            if not pdf.pages:
+        # Render first page straight to a grayscale bitmap with PDFium
+        # (in-process, no PIL round-trip; the bitmap is viewed as a numpy array)
+        pdf = pdfium.PdfDocument(str(input_path))
+        try:
+            if len(pdf) == 0:
                 return False
 
-            # Get first page and convert to image
-            page = pdf.pages[0]
-            pil_image = page.to_image(resolution=dpi).original
-
-            # Convert PIL image to numpy array for OpenCV
-            image_array = np.array(pil_image)
+            bitmap = pdf[0].render(scale=dpi / 72, grayscale=True)
+            image_array = bitmap.to_numpy()
+            if image_array.ndim == 3:
+                image_array = image_array[:, :, 0]
 
-        # Detect border
-        border_box = detect_border(image_array)
+            # Detect border
+            border_box = detect_border(image_array)
+        finally:
+            pdf.close()
 
         if border_box is None:
             return False
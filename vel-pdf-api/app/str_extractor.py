@@ -6,7 +6,13 @@ Based on reference/extract_str.py with Excel output capabilities
 
 import json
 import re
-import copy
+import sys
+import bisect
+import weakref
+from collections import namedtuple
+from operator import itemgetter
+from enum import IntEnum
+import numpy as np
 import pdfplumber
 from pathlib import Path
 from typing import Dict, List, Any, Optional, Tuple
@@ -14,7 +20,7 @@ from datetime import datetime
 from .pdf_cropper import crop_pdf_if_needed
 from .config.constants import (
     V2_OFFSET_X, V2_OFFSET_Y, TOLERANCE_DEFAULT, TOLERANCE_TIGHT, TOLERANCE_LABEL,
-    SECTION_HEADERS, SEARCH_RANGE_DEFAULT, SEARCH_RANGE_WARIS,
+    SECTION_HEADERS, SECTION_HEADER_ALL, SEARCH_RANGE_DEFAULT, SEARCH_RANGE_WARIS,
     WARIS_FIELD_LABELS, PASANGAN_FIELD_LABELS, SAME_LINE_THRESHOLD,
     DOCUMENT_TYPE, EXTRACTION_VERSION, EXCEL_SHEET_NAME, MAX_CHILDREN
 )
@@ -25,14 +31,147 @@ from .utils.text_cleaners import (
 )
 
 
+class FieldSection(IntEnum):
+    """Section a template field belongs to (names match the offsets keys)"""
+    PEMOHON = 0
+    PASANGAN = 1
+    ANAK = 2
+    WARIS = 3
+    HEADER = 4
+
+
+def _classify_field(field_name: str) -> Tuple[FieldSection, str]:
+    """Return a field's section and the name it is grouped under
+
+    pasangan_/waris_ fields are grouped without their prefix; all others keep
+    their full name.
+    """
+    if field_name.endswith('_header'):
+        return FieldSection.HEADER, field_name
+    if field_name.startswith('waris_'):
+        return FieldSection.WARIS, field_name.replace('waris_', '')
+    if field_name.startswith('pasangan_'):
+        return FieldSection.PASANGAN, field_name.replace('pasangan_', '')
+    if field_name.startswith('anak_'):
+        return FieldSection.ANAK, field_name
+    return FieldSection.PEMOHON, field_name
+
+
+# Template header field anchoring each section
+_SECTION_HEADER_FIELDS = {
+    'pemohon': 'maklumat_pemohon_header',
+    'pasangan': 'maklumat_pasangan_header',
+    'anak': 'maklumat_anak_header',
+    'waris': 'maklumat_waris_header',
+}
+
+# Cached page word: text, uppercased text, section keywords it contains, and its box
+Word = namedtuple('Word', 'text upper keywords x0 x1 top bottom')
+
+# Finds every section keyword inside a word, including overlapping ones
+_SECTION_KEYWORD_RE = re.compile(
+    '(?=(' + '|'.join(re.escape(kw) for kw in sorted(SECTION_HEADER_ALL)) + '))'
+)
+_DEFAULT_HEADER_KEYWORDS = frozenset({'MAKLUMAT'})
+
+# Fields read by to_excel_row_minimal, per section, in column order
+_MINIMAL_PEMOHON_KEYS = ('no_mykad', 'nama', 'telefon_bimbit', 'telefon_rumah', 'alamat', 'email')
+_MINIMAL_PASANGAN_KEYS = ('no_mykad', 'nama', 'telefon')
+_MINIMAL_WARIS_KEYS = ('hubungan', 'no_pengenalan', 'nama', 'telefon')
+_MINIMAL_PEMOHON_GETTER = itemgetter(*_MINIMAL_PEMOHON_KEYS)
+_MINIMAL_PASANGAN_GETTER = itemgetter(*_MINIMAL_PASANGAN_KEYS)
+_MINIMAL_WARIS_GETTER = itemgetter(*_MINIMAL_WARIS_KEYS)
+
+
+def _get_fields(section: Dict[str, Any], getter: itemgetter, keys: Tuple[str, ...]) -> Tuple[Any, ...]:
+    """Read several fields from a section in one call, with '' for any missing field"""
+    try:
+        return getter(section)
+    except KeyError:
+        return tuple(section.get(key, '') for key in keys)
+
+
+# Header keywords identifying the ANAK table (columns NAMA, NO.MYKAD/MYKID, UMUR, STATUS)
+_ANAK_TABLE_HEADER_KEYWORDS = ('NAMA', 'MYKAD', 'UMUR')
+
+# document_info keys not written as Excel columns
+_DOCUMENT_EXCLUDED_KEYS = frozenset({'extraction_date', 'extraction_version'})
+
+# Column prefixes for each supported child ('anak_1' ... 'anak_<MAX_CHILDREN>')
+_ANAK_PREFIXES = tuple(f'anak_{i}' for i in range(1, MAX_CHILDREN + 1))
+
+# Separator lines in the Details text (after the numbered items, and after each section)
+_DETAILS_FULL_SEPARATOR = "----------------------------"
+_DETAILS_SECTION_SEPARATOR = "------------------"
+
+# Address cleanup patterns
+_RE_COMMA_RUN = re.compile(r',\s*,+')
+_RE_WS_RUN = re.compile(r'\s+')
+
+
+def _box_word_indices(top: np.ndarray, x0: np.ndarray, x_min: float, x_max: float,
+                      y_min: float, y_max: float) -> np.ndarray:
+    """Indices of words whose (x0, top) fall inside a box, ordered by (top, x0)
+
+    Args:
+        top: Word tops, sorted ascending
+        x0: Word left edges, in the same order as top
+
+    Returns:
+        Indices into top/x0, sorted top to bottom, left to right
+    """
+    # Binary-search the Y band, then mask the X range within it
+    lo = np.searchsorted(top, y_min, side='left')
+    hi = np.searchsorted(top, y_max, side='right')
+    band = x0[lo:hi]
+    hits = lo + np.flatnonzero((band >= x_min) & (band <= x_max))
+
+    # Stable sort, so words at the same position keep page order
+    return hits[np.lexsort((x0[hits], top[hits]))]
+
+
+def _first_same_line_y(maklumat_ys: List[float], waris_ys: List[float]) -> Optional[float]:
+    """First MAKLUMAT top (in page order) with a WARIS word on the same line
+
+    Args:
+        maklumat_ys: Tops of MAKLUMAT words, in page order
+        waris_ys: Tops of WARIS words, in any order
+
+    Returns:
+        The matching MAKLUMAT top, or None if no pair is within SAME_LINE_THRESHOLD
+    """
+    waris_ys = sorted(waris_ys)
+    for mak_y in maklumat_ys:
+        # Only WARIS words inside the line band can match; bisect to its start
+        i = bisect.bisect_left(waris_ys, mak_y - SAME_LINE_THRESHOLD)
+        if i < len(waris_ys) and abs(mak_y - waris_ys[i]) <= SAME_LINE_THRESHOLD:
+            return mak_y
+    return None
+
+
 class STRExtractor:
+    # Fixed attribute set (no per-instance __dict__; attribute reads use slot descriptors)
+    __slots__ = (
+        'template_path', 'fields', 'pdf_dimensions', '_field_sections',
+        '_words_cache', '_word_index_cache', '_prefixed_keys_cache',
+    )
+
+    # Parsed templates shared by every extractor in the process:
+    # resolved path -> (file mtime, template, section and grouped name of each field)
+    _TEMPLATE_CACHE: Dict[str, Tuple[float, Dict[str, Any], Dict[str, Tuple[FieldSection, str]]]] = {}
+
     def __init__(self, template_path="app/templates/template.json"):
         """Initialize extractor with template"""
-        self.template_path = template_path
         self.load_template(template_path)
-
-    def load_template(self, template_path):
-        """Load template from file"""
+        # Words and their sorted coordinate arrays per page, weakly keyed by the page object
+        # so a collected page can never hand its words to a new page at the same address
+        self._words_cache: 'weakref.WeakKeyDictionary[Any, List[Word]]' = weakref.WeakKeyDictionary()
+        self._word_index_cache: 'weakref.WeakKeyDictionary[Any, Dict[str, Any]]' = weakref.WeakKeyDictionary()
+        # Prefixed Excel column names per (prefix, section keys); the schemas are fixed across PDFs
+        self._prefixed_keys_cache: Dict[Tuple[str, Tuple[str, ...]], Tuple[str, ...]] = {}
+
+    def _load_cached_template(self, template_path) -> Tuple[Dict[str, Any], Dict[str, Tuple[FieldSection, str]]]:
+        """Return a template and its field sections, parsing the file only when it is new or changed"""
         template_file = Path(template_path)
         if not template_file.exists():
             # Try looking in the project root
@@ -41,11 +180,70 @@ class STRExtractor:
         if not template_file.exists():
             raise FileNotFoundError(f"Template file not found: {template_path}")
 
+        # Keyed by resolved path, so relative and absolute names share one entry
+        resolved_path = str(template_file.resolve())
+        mtime = template_file.stat().st_mtime
+        cached = self._TEMPLATE_CACHE.get(resolved_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1], cached[2]
+
         with open(template_file, 'r', encoding='utf-8') as f:
             template = json.load(f)
 
+        # Section and grouped name of each field, classified once per template
+        field_sections = {
+            field_name: _classify_field(field_name) for field_name in template['fields']
+        }
+        self._TEMPLATE_CACHE[resolved_path] = (mtime, template, field_sections)
+        return template, field_sections
+
+    def load_template(self, template_path):
+        """Load template from file"""
+        self._use_template(template_path, *self._load_cached_template(template_path))
+
+    def _use_template(self, template_path, template: Dict[str, Any],
+                      field_sections: Dict[str, Tuple[FieldSection, str]]):
+        """Make an already parsed template the active one"""
+        self.template_path = template_path
         self.fields = template['fields']
         self.pdf_dimensions = template.get('pdf_dimensions', {})
+        self._field_sections = field_sections
+
+    def _get_words(self, page) -> List[Word]:
+        """Return the page's words as Word tuples, computed once per page"""
+        words = self._words_cache.get(page)
+        if words is None:
+            # Keyword matching is case-insensitive, so uppercase each word once here,
+            # and record which section keywords it contains for set lookups
+            words = []
+            for word in page.extract_words():
+                upper = word['text'].upper()
+                words.append(Word(
+                    word['text'], upper, frozenset(_SECTION_KEYWORD_RE.findall(upper)),
+                    word['x0'], word['x1'], word['top'], word['bottom']
+                ))
+            self._words_cache[page] = words
+        return words
+
+    def _get_word_index(self, page) -> Dict[str, Any]:
+        """Return the page's word coordinates as numpy arrays sorted by top
+
+        Lets box lookups binary-search the Y range instead of scanning every word.
+        """
+        index = self._word_index_cache.get(page)
+        if index is None:
+            words = self._get_words(page)
+            # Fill each array in one sized allocation, without an intermediate list
+            count = len(words)
+            top = np.fromiter((word.top for word in words), dtype=np.float64, count=count)
+            x0 = np.fromiter((word.x0 for word in words), dtype=np.float64, count=count)
+            order = np.argsort(top, kind='stable')
+            index = self._word_index_cache[page] = {
+                'top': top[order],
+                'x0': x0[order],
+                'text': [words[i].text for i in order],
+            }
+        return index
 
     def detect_section_offset(self, page, header_field_name, page_count=1, template_box=None):
         """Detect Y-offset for a section by finding its header position
@@ -67,56 +265,52 @@ class STRExtractor:
         template_x = template_box['x']
         template_w = template_box['width']
 
-        keywords = SECTION_HEADERS.get(header_field_name, ['MAKLUMAT'])
+        keywords = SECTION_HEADERS.get(header_field_name, _DEFAULT_HEADER_KEYWORDS)
 
         # Use larger search range for waris section (variable position due to anak section)
         search_range = SEARCH_RANGE_WARIS if header_field_name == 'maklumat_waris_header' else SEARCH_RANGE_DEFAULT
 
         try:
             # Get all words in the page
-            words = page.extract_words()
+            words = self._get_words(page)
 
             # For waris header, need to find both MAKLUMAT and WARIS nearby
             if header_field_name == 'maklumat_waris_header':
-                # Find all MAKLUMAT words first
-                maklumat_words = []
-                waris_words = []
+                # Find all MAKLUMAT and WARIS word positions first
+                maklumat_ys = []
+                waris_ys = []
 
                 for word in words:
-                    word_text = word['text'].upper()
-                    word_x = word['x0']
-                    word_y = word['top']
+                    word_x = word.x0
+                    word_y = word.top
 
                     # Look for keywords in expected X range
                     if template_x - 20 <= word_x <= template_x + template_w + 20:
                         # For multi-page PDFs: no Y constraint (waris can be anywhere)
                         # For single-page PDFs: use Y constraint for precision
                         if page_count > 1 or abs(word_y - template_y) <= search_range:
-                            if 'MAKLUMAT' in word_text:
-                                maklumat_words.append((word_y, word_x, word_text))
-                            elif 'WARIS' in word_text:
-                                waris_words.append((word_y, word_x, word_text))
+                            if 'MAKLUMAT' in word.keywords:
+                                maklumat_ys.append(word_y)
+                            elif 'WARIS' in word.keywords:
+                                waris_ys.append(word_y)
 
                 # Find MAKLUMAT and WARIS that are on the same line
-                for mak_y, mak_x, mak_text in maklumat_words:
-                    for war_y, war_x, war_text in waris_words:
-                        if abs(mak_y - war_y) <= SAME_LINE_THRESHOLD:
-                            actual_y = mak_y
-                            offset = int(actual_y - template_y)
-                            return offset
+                actual_y = _first_same_line_y(maklumat_ys, waris_ys)
+                if actual_y is None:
+                    # WARIS header not found
+                    return None
 
-                # WARIS header not found
-                return None
+                return int(actual_y - template_y)
 
             # For other headers, use original logic
             candidates = []
             for word in words:
-                word_text = word['text'].upper()
-                word_x = word['x0']
-                word_y = word['top']
+                word_text = word.upper
+                word_x = word.x0
+                word_y = word.top
 
                 # Check if word matches any keyword and is in correct X range
-                if (any(kw in word_text for kw in keywords) and
+                if (not keywords.isdisjoint(word.keywords) and
                     template_x - 20 <= word_x <= template_x + template_w + 20 and
                     abs(word_y - template_y) <= search_range):
                     candidates.append((word_y, word_text))
@@ -132,6 +326,69 @@ class STRExtractor:
 
         return 0  # No offset if header not found
 
+    def _detect_all_section_offsets(self, page, page_count=1) -> Dict[str, Optional[int]]:
+        """Detect the offsets of all four sections in a single pass over the page's words
+
+        Applies the same rules as detect_section_offset for each header, using
+        the template coordinates in self.fields.
+
+        Returns:
+            Dict of section name ('pemohon', 'pasangan', 'anak', 'waris') to Y-offset;
+            waris is None if its header is not found
+        """
+        offsets = {section: 0 for section in _SECTION_HEADER_FIELDS}
+        waris_header = _SECTION_HEADER_FIELDS['waris']
+
+        # Headers matched by "first word with any keyword" (all but waris)
+        pending = {
+            header: (section, self.fields[header], SECTION_HEADERS.get(header, _DEFAULT_HEADER_KEYWORDS))
+            for section, header in _SECTION_HEADER_FIELDS.items()
+            if header != waris_header and header in self.fields
+        }
+        waris_box = self.fields.get(waris_header)
+        if waris_box is not None:
+            offsets['waris'] = None
+
+        try:
+            maklumat_words = []
+            waris_words = []
+
+            for word in self._get_words(page):
+                word_keywords = word.keywords
+                if not word_keywords:
+                    # Every header rule needs at least one section keyword
+                    continue
+
+                word_x = word.x0
+                word_y = word.top
+
+                for header, (section, box, keywords) in list(pending.items()):
+                    if (not keywords.isdisjoint(word_keywords) and
+                        box['x'] - 20 <= word_x <= box['x'] + box['width'] + 20 and
+                        abs(word_y - box['y']) <= SEARCH_RANGE_DEFAULT):
+                        # Use the first matching candidate (should be the header)
+                        offsets[section] = int(word_y - box['y'])
+                        del pending[header]
+
+                # Waris needs MAKLUMAT and WARIS on the same line (no Y constraint on multi-page PDFs)
+                if (waris_box is not None and
+                    waris_box['x'] - 20 <= word_x <= waris_box['x'] + waris_box['width'] + 20 and
+                    (page_count > 1 or abs(word_y - waris_box['y']) <= SEARCH_RANGE_WARIS)):
+                    if 'MAKLUMAT' in word_keywords:
+                        maklumat_words.append(word_y)
+                    elif 'WARIS' in word_keywords:
+                        waris_words.append(word_y)
+
+            if waris_box is not None:
+                actual_y = _first_same_line_y(maklumat_words, waris_words)
+                offsets['waris'] = None if actual_y is None else int(actual_y - waris_box['y'])
+
+        except Exception as e:
+            # Same fallback as detect_section_offset: no offset
+            offsets = {section: 0 for section in _SECTION_HEADER_FIELDS}
+
+        return offsets
+
     def extract_text_from_box(self, page, box, y_offset=0, tolerance=TOLERANCE_DEFAULT):
         """Extract text using word filtering with section-based Y-offset and tolerance
 
@@ -150,83 +407,103 @@ class STRExtractor:
         y_adjusted = y + y_offset
 
         try:
-            # Get all words on page with their coordinates
-            words = page.extract_words()
+            # Word coordinates sorted by top
+            index = self._get_word_index(page)
+            top, x0 = index['top'], index['x0']
 
             # Filter words within bounding box with Y-tolerance
             # Using tight tolerance since we already applied section offset
-            field_words = [
-                word for word in words
-                if (x <= word['x0'] <= x + w) and
-                   (y_adjusted - tolerance <= word['top'] <= y_adjusted + h + tolerance)
-            ]
-
-            if field_words:
-                # Sort by position (top to bottom, left to right)
-                field_words.sort(key=lambda w: (w['top'], w['x0']))
-                # Join words preserving order
-                text = ' '.join([w['text'] for w in field_words])
-                # Clean up the text
-                text = text.strip()
-                # Replace multiple spaces with single space
-                text = ' '.join(text.split())
-                # Remove trailing punctuation (colons, semicolons, etc.)
-                text = text.rstrip(':;,.')
-                return text
+            hits = _box_word_indices(top, x0, x, x + w, y_adjusted - tolerance, y_adjusted + h + tolerance)
+
+            if hits.size:
+                texts = index['text']
+                # Join words preserving order. extract_words() splits on whitespace,
+                # so words are non-empty and space-free and the join needs no
+                # strip/whitespace collapsing; just remove trailing punctuation
+                # (colons, semicolons, etc.)
+                return ' '.join([texts[i] for i in hits]).rstrip(':;,.')
 
             return ""
 
         except Exception as e:
             return ""
 
-    def extract_anak_table(self, page):
-        """Extract MAKLUMAT ANAK table using pdfplumber table detection"""
-        try:
-            # Extract all tables from the page
-            tables = page.extract_tables()
+    def extract_anak_table(self, page, bbox=None):
+        """Extract MAKLUMAT ANAK table using pdfplumber table detection
 
-            # Find the MAKLUMAT ANAK table (usually contains columns: NAMA, NO.MYKAD/MYKID, UMUR, STATUS)
-            for table in tables:
-                if not table or len(table) < 2:
-                    continue
-
-                # Check if this is the ANAK table by looking at headers
-                header = table[0] if table else []
-                header_text = ' '.join([str(cell or '').upper() for cell in header])
-
-                if 'NAMA' in header_text and 'MYKAD' in header_text and 'UMUR' in header_text:
-                    # Found the ANAK table
-                    children = []
-                    for row in table[1:]:  # Skip header row
-                        if not row or all(cell is None or str(cell).strip() == '' for cell in row):
-                            continue  # Skip empty rows
-
-                        # Extract child data (handle variable column positions)
-                        child = {}
-                        for i, cell in enumerate(row):
-                            cell_value = str(cell).strip() if cell else ""
-                            if i < len(header) and header[i]:
-                                field_name = str(header[i]).strip().lower()
-                                # Normalize field names
-                                if 'nama' in field_name:
-                                    child['nama'] = cell_value
-                                elif 'mykad' in field_name or 'mykid' in field_name:
-                                    child['no_mykad'] = cell_value
-                                elif 'umur' in field_name:
-                                    child['umur'] = cell_value
-                                elif 'status' in field_name or 'hubungan' in field_name:
-                                    child['status'] = cell_value
-
-                        if child:  # Only add if we extracted something
-                            children.append(child)
+        Args:
+            page: pdfplumber page object
+            bbox: Optional (x0, top, x1, bottom) band expected to hold the table.
+                  Table detection runs on that crop first (far fewer edges and
+                  chars to analyse) and falls back to the whole page.
+        """
+        # Table detection is the costliest step; a header cell can only hold a
+        # keyword that some word on the page contains, so skip pages without them
+        words = self._get_words(page)
+        if not all(any(kw in word.upper for word in words) for kw in _ANAK_TABLE_HEADER_KEYWORDS):
+            return []
 
+        if bbox is not None:
+            try:
+                children = self._find_anak_table(page.crop(bbox).extract_tables())
+                if children is not None:
                     return children
+            except Exception as e:
+                pass
 
-            return []
+        try:
+            # Extract all tables from the page
+            children = self._find_anak_table(page.extract_tables())
+            return children if children is not None else []
 
         except Exception as e:
             return []
 
+    def _find_anak_table(self, tables) -> Optional[List[Dict[str, str]]]:
+        """Parse children from the ANAK table among extracted tables
+
+        Returns:
+            List of children, or None if no ANAK table is present
+        """
+        # Find the MAKLUMAT ANAK table (usually contains columns: NAMA, NO.MYKAD/MYKID, UMUR, STATUS)
+        for table in tables:
+            if not table or len(table) < 2:
+                continue
+
+            # Check if this is the ANAK table by looking at headers
+            header = table[0] if table else []
+            header_text = ' '.join([str(cell or '').upper() for cell in header])
+
+            if all(kw in header_text for kw in _ANAK_TABLE_HEADER_KEYWORDS):
+                # Found the ANAK table
+                children = []
+                for row in table[1:]:  # Skip header row
+                    if not row or all(cell is None or str(cell).strip() == '' for cell in row):
+                        continue  # Skip empty rows
+
+                    # Extract child data (handle variable column positions)
+                    child = {}
+                    for i, cell in enumerate(row):
+                        cell_value = str(cell).strip() if cell else ""
+                        if i < len(header) and header[i]:
+                            field_name = str(header[i]).strip().lower()
+                            # Normalize field names
+                            if 'nama' in field_name:
+                                child['nama'] = cell_value
+                            elif 'mykad' in field_name or 'mykid' in field_name:
+                                child['no_mykad'] = cell_value
+                            elif 'umur' in field_name:
+                                child['umur'] = cell_value
+                            elif 'status' in field_name or 'hubungan' in field_name:
+                                child['status'] = cell_value
+
+                    if child:  # Only add if we extracted something
+                        children.append(child)
+
+                return children
+
+        return None
+
     def _extract_section_by_header(self, page, header_keywords: List[str],
                                     field_labels: Dict[str, str],
                                     next_section_keywords: Optional[List[str]] = None) -> Dict[str, str]:
@@ -243,15 +520,39 @@ class STRExtractor:
         """
         try:
             # Find the section header text
-            text_objects = page.extract_words()
+            text_objects = self._get_words(page)
+
+            # Words sorted by top, so each word's line (all words within
+            # SAME_LINE_THRESHOLD of its top) is a contiguous slice found by bisection
+            order = sorted(range(len(text_objects)), key=lambda i: text_objects[i].top)
+            sorted_tops = [text_objects[i].top for i in order]
+            upper_texts = [w.upper for w in text_objects]
+            line_matches = {}
+
+            # Section keywords contain no spaces, so a keyword occurs in a line's text
+            # exactly when some word on it contains it, i.e. it is in a word's keyword set
+            header_keyword_set = frozenset(header_keywords)
+            header_uses_sets = header_keyword_set <= SECTION_HEADER_ALL
 
             header_y = None
             for word in text_objects:
-                text = word['text'].upper()
-                if all(kw in ' '.join([w['text'].upper() for w in text_objects
-                                       if abs(w['top'] - word['top']) < SAME_LINE_THRESHOLD])
-                       for kw in header_keywords):
-                    header_y = word['bottom']
+                lo = bisect.bisect_right(sorted_tops, word.top - SAME_LINE_THRESHOLD)
+                hi = bisect.bisect_left(sorted_tops, word.top + SAME_LINE_THRESHOLD)
+
+                # Words on the same line share a slice, so each line is checked once
+                matched = line_matches.get((lo, hi))
+                if matched is None:
+                    line_words = order[lo:hi]
+                    if header_uses_sets:
+                        line_keywords = frozenset().union(*(text_objects[i].keywords for i in line_words))
+                        matched = header_keyword_set <= line_keywords
+                    else:
+                        line_text = ' '.join(upper_texts[i] for i in sorted(line_words))
+                        matched = all(kw in line_text for kw in header_keywords)
+                    line_matches[(lo, hi)] = matched
+
+                if matched:
+                    header_y = word.bottom
                     break
 
             if not header_y:
@@ -260,39 +561,59 @@ class STRExtractor:
             # Find the next section header to limit extraction area
             next_section_y = page.height
             if next_section_keywords:
+                next_keyword_set = frozenset(next_section_keywords)
+                next_uses_sets = next_keyword_set <= SECTION_HEADER_ALL
                 for word in text_objects:
-                    if word['top'] > header_y:
-                        text = word['text'].upper()
-                        if any(kw in text for kw in next_section_keywords):
-                            next_section_y = word['top']
+                    if word.top > header_y:
+                        if (not next_keyword_set.isdisjoint(word.keywords) if next_uses_sets
+                                else any(kw in word.upper for kw in next_section_keywords)):
+                            next_section_y = word.top
                             break
 
-            # Extract text in the section
+            # Extract text in the section. within_bbox keeps the characters inside the
+            # box, so a word crossing its edge comes back truncated rather than
+            # dropped; the cropped page is re-parsed instead of filtering cached words
             section_bbox = (0, header_y, page.width, next_section_y)
-            section = page.within_bbox(section_bbox)
-            section_words = section.extract_words()
+            section_words = self._get_words(page.within_bbox(section_bbox))
+
+            # Locate every label in one pass over the section words: each label
+            # takes the first word (in page order) whose text contains it
+            pending = {field_key: label_text.upper() for field_key, label_text in field_labels.items()}
+            label_words = {}
+            for word in section_words:
+                if not pending:
+                    break
+                for field_key, label_upper in list(pending.items()):
+                    if label_upper in word.upper:
+                        label_words[field_key] = word
+                        del pending[field_key]
+
+            # Section words sorted by top, so a label's line is a slice found by bisection
+            line_order = sorted(range(len(section_words)), key=lambda i: section_words[i].top)
+            line_tops = [section_words[i].top for i in line_order]
 
             # Extract field values
             extracted_data = {}
-            for field_key, label_text in field_labels.items():
-                for i, word in enumerate(section_words):
-                    if label_text.upper() in word['text'].upper():
-                        label_y = word['top']
-                        label_x_end = word['x1']
-
-                        # Collect all text after the label on the same line
-                        value_parts = []
-                        for other_word in section_words:
-                            if (abs(other_word['top'] - label_y) < TOLERANCE_LABEL and
-                                other_word['x0'] > label_x_end and
-                                other_word['text'].strip() != ':'):
-                                value_parts.append(other_word['text'])
-
-                        extracted_data[field_key] = ' '.join(value_parts).strip() if value_parts else ""
-                        break
-
-                if field_key not in extracted_data:
+            for field_key in field_labels:
+                word = label_words.get(field_key)
+                if word is None:
                     extracted_data[field_key] = ""
+                    continue
+
+                label_y = word.top
+                label_x_end = word.x1
+
+                # Collect all text after the label on the same line (in page order)
+                lo = bisect.bisect_right(line_tops, label_y - TOLERANCE_LABEL)
+                hi = bisect.bisect_left(line_tops, label_y + TOLERANCE_LABEL)
+                value_parts = []
+                for j in sorted(line_order[lo:hi]):
+                    other_word = section_words[j]
+                    if (other_word.x0 > label_x_end and
+                        other_word.text.strip() != ':'):
+                        value_parts.append(other_word.text)
+
+                extracted_data[field_key] = ' '.join(value_parts).strip() if value_parts else ""
 
             return extracted_data
 
@@ -318,17 +639,35 @@ class STRExtractor:
         )
 
 
-    def _load_template_by_status(self, page, working_fields: Dict, has_v2_border: bool) -> Dict:
+    def _working_fields(self, has_v2_border: bool) -> Dict[str, Dict]:
+        """Copy the template boxes, shifted by the V2 offset if needed
+
+        Boxes are flat {x, y, width, height} dicts, so copying each box is
+        enough and avoids a deepcopy per PDF.
+        """
+        if not has_v2_border:
+            return {name: dict(box) for name, box in self.fields.items()}
+
+        return {
+            name: {**box, 'x': box['x'] + V2_OFFSET_X, 'y': box['y'] + V2_OFFSET_Y}
+            for name, box in self.fields.items()
+        }
+
+    def _load_template_by_status(self, page, working_fields: Dict, has_v2_border: bool) -> Tuple[Dict, Optional[Tuple[Dict, str]]]:
         """Load appropriate template based on status_perkahwinan
 
         Returns:
-            Updated working_fields dict
+            Tuple of (updated working_fields dict, status_probe) where status_probe is
+            the (box, text) used to read status_perkahwinan, or None if the template has no such box
         """
         # Quick extraction of status_perkahwinan to determine template
         status_perkahwinan = ""
+        status_probe = None
         if 'status_perkahwinan' in working_fields:
             status_box = working_fields['status_perkahwinan']
-            status_perkahwinan = self.extract_text_from_box(page, status_box).upper()
+            status_text = self.extract_text_from_box(page, status_box)
+            status_probe = (status_box, status_text)
+            status_perkahwinan = status_text.upper()
 
         # Determine which template to use
         if 'KAHWIN' in status_perkahwinan:
@@ -336,18 +675,15 @@ class STRExtractor:
         else:
             template_to_use = "app/templates/template_without_pasangan.json"
 
-        # Reload appropriate template if different
-        if template_to_use != self.template_path:
-            self.load_template(template_to_use)
-            # Re-create working copy with new template
-            working_fields = copy.deepcopy(self.fields)
-            # Re-apply v2 offset to new template if needed
-            if has_v2_border:
-                for field_name, box in working_fields.items():
-                    box['x'] += V2_OFFSET_X
-                    box['y'] += V2_OFFSET_Y
+        # Fetch through the mtime-checked cache (one stat per PDF), so an edited
+        # template is picked up; switch if the path or the parsed template changed
+        template, field_sections = self._load_cached_template(template_to_use)
+        if template_to_use != self.template_path or field_sections is not self._field_sections:
+            self._use_template(template_to_use, template, field_sections)
+            # Re-create working copy with new template (re-applying v2 offset if needed)
+            working_fields = self._working_fields(has_v2_border)
 
-        return working_fields
+        return working_fields, status_probe
 
     def _calculate_section_offsets(self, pdf, page, has_v2_border: bool, working_fields: Dict) -> Tuple[Dict[str, int], Any, bool]:
         """Calculate section offsets and determine waris page
@@ -385,13 +721,8 @@ class STRExtractor:
                 'waris': waris_adjusted_offset
             }
         else:
-            # Detect section offsets using header anchors (v1 format only)
-            offsets = {
-                'pemohon': self.detect_section_offset(page, 'maklumat_pemohon_header', page_count),
-                'pasangan': self.detect_section_offset(page, 'maklumat_pasangan_header', page_count),
-                'anak': self.detect_section_offset(page, 'maklumat_anak_header', page_count),
-                'waris': self.detect_section_offset(page, 'maklumat_waris_header', page_count)
-            }
+            # Detect section offsets using header anchors (v1 format only), in one pass over the words
+            offsets = self._detect_all_section_offsets(page, page_count)
 
         # Check if WARIS section exists on page 1
         waris_exists = offsets['waris'] is not None
@@ -411,9 +742,14 @@ class STRExtractor:
         return offsets, waris_page, waris_exists
 
     def _extract_all_fields(self, working_fields: Dict, page, offsets: Dict,
-                           waris_page, waris_exists: bool) -> Tuple[Dict, Dict, Dict]:
+                           waris_page, waris_exists: bool,
+                           status_probe: Optional[Tuple[Dict, str]] = None) -> Tuple[Dict, Dict, Dict]:
         """Extract all fields from bounding boxes with section-specific offsets
 
+        Args:
+            status_probe: (box, text) already read for status_perkahwinan in stage 1;
+                reused when the final box and offset would read the same text
+
         Returns:
             Tuple of (all_fields, pasangan_fields, waris_fields)
         """
@@ -422,78 +758,99 @@ class STRExtractor:
         waris_fields = {}
 
         for field_name, box in working_fields.items():
+            section, clean_name = self._field_sections[field_name]
+
             # Skip header fields (not actual data)
-            if field_name.endswith('_header'):
+            if section == FieldSection.HEADER:
                 continue
 
             # Skip waris fields if waris section doesn't exist
-            if field_name.startswith('waris_') and not waris_exists:
+            if section == FieldSection.WARIS and not waris_exists:
                 continue
 
             # Determine section-specific offset and page to extract from
-            if field_name.startswith('waris_'):
+            if section == FieldSection.WARIS:
                 offset = offsets['waris'] if offsets['waris'] is not None else 0
                 extract_page = waris_page
-            elif field_name.startswith('pasangan_'):
-                offset = offsets['pasangan']
-                extract_page = page
-            elif field_name.startswith('anak_'):
-                offset = offsets['anak']
-                extract_page = page
             else:
-                # Main applicant section (MAKLUMAT PEMOHON)
-                offset = offsets['pemohon']
+                # PEMOHON (main applicant), PASANGAN and ANAK are all on page 1
+                offset = offsets[section.name.lower()]
                 extract_page = page
 
             # Determine field-specific tolerance (jantina needs tighter tolerance)
             tolerance = TOLERANCE_TIGHT if field_name == 'jantina' else TOLERANCE_DEFAULT
 
-            # Extract with section offset and field-specific tolerance
-            text = self.extract_text_from_box(extract_page, box, y_offset=offset, tolerance=tolerance)
+            # Reuse the stage-1 status read if this is the same box, page and tolerance
+            if (field_name == 'status_perkahwinan' and status_probe is not None and
+                offset == 0 and extract_page is page and box == status_probe[0]):
+                text = status_probe[1]
+            else:
+                # Extract with section offset and field-specific tolerance
+                text = self.extract_text_from_box(extract_page, box, y_offset=offset, tolerance=tolerance)
 
-            # Group fields by prefix
-            if field_name.startswith('pasangan_'):
-                clean_name = field_name.replace('pasangan_', '')
+            # Group fields by section
+            if section == FieldSection.PASANGAN:
                 pasangan_fields[clean_name] = text
-            elif field_name.startswith('waris_'):
-                clean_name = field_name.replace('waris_', '')
+            elif section == FieldSection.WARIS:
                 waris_fields[clean_name] = text
             else:
-                all_fields[field_name] = text
+                all_fields[clean_name] = text
 
         return all_fields, pasangan_fields, waris_fields
 
+    def _anak_table_bbox(self, page, working_fields: Dict, offsets: Dict) -> Optional[Tuple[float, float, float, float]]:
+        """Part of page 1 from the ANAK header down, where the ANAK table sits
+
+        The band runs to the page bottom rather than stopping at the WARIS
+        header, so a long table can never be cut short by the crop.
+
+        Returns:
+            (x0, top, x1, bottom) crop box, or None if the ANAK header has no template box
+        """
+        anak_box = working_fields.get('maklumat_anak_header')
+        if anak_box is None:
+            return None
+
+        x0, page_top, x1, page_bottom = page.bbox
+        top = max(page_top, anak_box['y'] + (offsets.get('anak') or 0) - TOLERANCE_LABEL)
+        if top >= page_bottom:
+            return None
+
+        return (x0, top, x1, page_bottom)
+
     def extract_from_pdf(self, pdf_path):
         """Extract all fields from a PDF with two-stage template selection"""
+        # Start from empty word caches (direct calls to the public helpers may have filled them)
+        self._words_cache.clear()
+        self._word_index_cache.clear()
+
         # Detect if this is v2 format (with black border)
-        working_pdf_path, has_v2_border, temp_file = crop_pdf_if_needed(pdf_path, dpi=150)
+        working_pdf_path, has_v2_border, temp_file = crop_pdf_if_needed(pdf_path)
 
         try:
-            with pdfplumber.open(working_pdf_path) as pdf:
+            # Only pages 1-2 are ever read (main data, WARIS overflow), so don't
+            # build page objects for the rest. len(pdf.pages) is then at most 2,
+            # which still tells single-page from multi-page PDFs
+            with pdfplumber.open(working_pdf_path, pages=[1, 2]) as pdf:
                 page = pdf.pages[0]  # First page for main data
 
-                # Create a working copy of fields to avoid mutating the original template
-                working_fields = copy.deepcopy(self.fields)
-
-                # If v2 format, apply offset to working copy
-                if has_v2_border:
-                    for field_name, box in working_fields.items():
-                        box['x'] += V2_OFFSET_X
-                        box['y'] += V2_OFFSET_Y
+                # Create a working copy of fields (v2 offset applied) to avoid mutating the original template
+                working_fields = self._working_fields(has_v2_border)
 
                 # STAGE 1: Load appropriate template based on status_perkahwinan
-                working_fields = self._load_template_by_status(page, working_fields, has_v2_border)
+                working_fields, status_probe = self._load_template_by_status(page, working_fields, has_v2_border)
 
                 # STAGE 2: Calculate section offsets (pass V2-adjusted working_fields)
                 offsets, waris_page, waris_exists = self._calculate_section_offsets(pdf, page, has_v2_border, working_fields)
 
                 # STAGE 3: Extract all fields
                 all_fields, pasangan_fields, waris_fields = self._extract_all_fields(
-                    working_fields, page, offsets, waris_page, waris_exists
+                    working_fields, page, offsets, waris_page, waris_exists, status_probe
                 )
 
                 # Extract MAKLUMAT ANAK table (always on page 1)
-                children = self.extract_anak_table(page)
+                anak_bbox = self._anak_table_bbox(page, working_fields, offsets)
+                children = self.extract_anak_table(page, bbox=anak_bbox)
 
                 # Structure the data
                 structured_data = self.structure_data(all_fields, pasangan_fields, waris_fields, children)
@@ -503,7 +860,9 @@ class STRExtractor:
 
                 return structured_data
         finally:
-            pass  # No cleanup needed anymore
+            # Drop this PDF's words rather than keep them alive until its pages are collected
+            self._words_cache.clear()
+            self._word_index_cache.clear()
 
 
     def smart_combine_address(self, alamat_surat: str, poskod: str,
@@ -522,8 +881,9 @@ class STRExtractor:
         if not alamat_surat:
             alamat_surat = ""
 
-        # Normalize for comparison
+        # Normalize for comparison (tokenized once for all the overlap checks)
         alamat_upper = ' '.join(alamat_surat.upper().split())
+        alamat_tokens = frozenset(alamat_upper.split())
 
         # Clean individual components
         poskod_clean = extract_postal_code(poskod) if poskod else ""
@@ -542,12 +902,12 @@ class STRExtractor:
             bandar_normalized = ' '.join(bandar_clean.upper().split())
             if bandar_normalized not in alamat_upper:
                 bandar_words = set(bandar_normalized.split())
-                alamat_words = set(alamat_upper.split())
-                if len(bandar_words & alamat_words) < len(bandar_words) * 0.5:
+                if len(alamat_tokens.intersection(bandar_words)) < len(bandar_words) * 0.5:
                     parts_to_add.append(bandar_clean)
 
         # Check if state is already in alamat_surat using utility function
-        if negeri_clean and not is_state_in_address(negeri_clean, alamat_surat):
+        # (passed pre-normalized; normalizing again is a no-op)
+        if negeri_clean and not is_state_in_address(negeri_clean, alamat_upper):
             parts_to_add.append(negeri_clean)
 
         # Combine: start with alamat_surat, then add missing parts
@@ -559,8 +919,8 @@ class STRExtractor:
 
         # Final cleanup
         combined = remove_section_labels(combined)
-        combined = re.sub(r',\s*,+', ',', combined)
-        combined = re.sub(r'\s+', ' ', combined).strip()
+        combined = _RE_COMMA_RUN.sub(',', combined)
+        combined = _RE_WS_RUN.sub(' ', combined).strip()
         combined = combined.strip(',').strip()
 
         return combined
@@ -628,157 +988,245 @@ class STRExtractor:
         return structured
 
     def flatten_dict(self, d: Dict[str, Any], parent_key: str = '', sep: str = '_') -> Dict[str, Any]:
-        """Flatten nested dictionary"""
-        items = []
-        for k, v in d.items():
-            new_key = f"{parent_key}{sep}{k}" if parent_key else k
-            if isinstance(v, dict):
-                items.extend(self.flatten_dict(v, new_key, sep=sep).items())
+        """Flatten nested dictionary
+
+        Walks nested dicts with an explicit stack of item iterators, so keys
+        come out in the same depth-first order as a recursive flatten.
+        Extraction results only nest plain dicts, so nesting is detected by exact type.
+        """
+        # Already flat (e.g. waris, document_info): a plain copy keeps key order
+        if not parent_key and dict not in map(type, d.values()):
+            return dict(d)
+
+        flat = {}
+        stack = [(parent_key, iter(d.items()))]
+        while stack:
+            prefix, items = stack[-1]
+            for k, v in items:
+                new_key = f"{prefix}{sep}{k}" if prefix else k
+                if type(v) is dict:
+                    # Descend; this level resumes from its iterator afterwards
+                    stack.append((new_key, iter(v.items())))
+                    break
+                flat[new_key] = v
             else:
-                items.append((new_key, v))
-        return dict(items)
+                stack.pop()
+        return flat
 
-    def _format_details(self, data: Dict[str, Any], include_full_data: bool = True) -> str:
+    def _flatten_all(self, data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Flatten each nested section of a record once, for reuse by all row builders
+
+        Returns:
+            Dict of section name ('pemohon', 'pasangan', 'waris', 'document_info') to its flat dict,
+            for the non-empty sections in data (empty ones contribute nothing, so are skipped)
+        """
+        flat = {}
+        for section in ('pemohon', 'pasangan', 'waris', 'document_info'):
+            section_data = data.get(section)
+            if section_data:
+                flat[section] = self.flatten_dict(section_data)
+        return flat
+
+    def _prefixed_columns(self, prefix: str, flat: Dict[str, Any]) -> Dict[str, Any]:
+        """Map a flat section dict to '<prefix>_<key>' columns, reusing cached column names"""
+        keys = tuple(flat)
+        cache_key = (prefix, keys)
+        columns = self._prefixed_keys_cache.get(cache_key)
+        if columns is None:
+            # Interned, so every row shares the same key objects
+            columns = tuple(sys.intern(f'{prefix}_{key}') for key in keys)
+            self._prefixed_keys_cache[cache_key] = columns
+        return dict(zip(columns, flat.values()))
+
+    def _format_details(self, data: Dict[str, Any], include_full_data: bool = True,
+                        flat: Optional[Dict[str, Dict[str, Any]]] = None,
+                        minimal_text: Optional[str] = None) -> str:
         """Format data into multiline text column
 
         Args:
             data: Structured data dictionary
             include_full_data: If True, include all sections; if False, only numbered fields (1-13)
+            flat: Optional precomputed _flatten_all(data)
+            minimal_text: Optional precomputed numbered fields text (the include_full_data=False result)
 
         Returns:
             Formatted multiline string
         """
-        lines = []
-
-        # Get data sections
-        pemohon = data.get('pemohon', {})
-        pasangan = data.get('pasangan', {})
-        waris = data.get('waris', {})
-
         # Section 1: Numbered minimal fields (1-13) - always included
-        lines.append(f"(1) NAME :- {pemohon.get('nama', '')}")
-        lines.append(f"(2) IC :- {pemohon.get('no_mykad', '')}")
-        lines.append(f"(3) PH1 :- {pemohon.get('telefon_bimbit', '')}")
-        lines.append(f"(4) PH2 :- {pemohon.get('telefon_rumah', '')}")
-        lines.append(f"(5) ADDRESS :- {pemohon.get('alamat', '')}")
-        lines.append(f"(6) SPOUSE IC :- {pasangan.get('no_mykad', '')}")
-        lines.append(f"(7) SPOUSE NAME :- {pasangan.get('nama', '')}")
-        lines.append(f"(8) SPOUSE PH :- {pasangan.get('telefon', '')}")
-        lines.append(f"(9) RELATION :- {waris.get('hubungan', '')}")
-        lines.append(f"(10) REL-IC :- {waris.get('no_pengenalan', '')}")
-        lines.append(f"(11) REL-NAME :- {waris.get('nama', '')}")
-        lines.append(f"(12) REL-PH1 :- {waris.get('telefon', '')}")
-        lines.append(f"(13) EMAIL :- {pemohon.get('email', '')}")
+        if minimal_text is None:
+            pemohon = data.get('pemohon', {})
+            pasangan = data.get('pasangan', {})
+            waris = data.get('waris', {})
+
+            # One f-string builds all 13 lines in a single formatting step
+            minimal_text = (
+                f"(1) NAME :- {pemohon.get('nama', '')}\n"
+                f"(2) IC :- {pemohon.get('no_mykad', '')}\n"
+                f"(3) PH1 :- {pemohon.get('telefon_bimbit', '')}\n"
+                f"(4) PH2 :- {pemohon.get('telefon_rumah', '')}\n"
+                f"(5) ADDRESS :- {pemohon.get('alamat', '')}\n"
+                f"(6) SPOUSE IC :- {pasangan.get('no_mykad', '')}\n"
+                f"(7) SPOUSE NAME :- {pasangan.get('nama', '')}\n"
+                f"(8) SPOUSE PH :- {pasangan.get('telefon', '')}\n"
+                f"(9) RELATION :- {waris.get('hubungan', '')}\n"
+                f"(10) REL-IC :- {waris.get('no_pengenalan', '')}\n"
+                f"(11) REL-NAME :- {waris.get('nama', '')}\n"
+                f"(12) REL-PH1 :- {waris.get('telefon', '')}\n"
+                f"(13) EMAIL :- {pemohon.get('email', '')}"
+            )
 
         # Only add full data sections if requested
-        if include_full_data:
-            lines.append("----------------------------")
-
-            # Section 2: All pemohon fields with prefix
-            if 'pemohon' in data:
-                pemohon_flat = self.flatten_dict(data['pemohon'])
-                for key, value in pemohon_flat.items():
-                    lines.append(f"pemohon_{key} :- {value}")
-            lines.append("------------------")
-
-            # Section 3: All pasangan fields with prefix
-            if 'pasangan' in data:
-                pasangan_flat = self.flatten_dict(data['pasangan'])
-                for key, value in pasangan_flat.items():
-                    lines.append(f"pasangan_{key} :- {value}")
-            lines.append("------------------")
-
-            # Section 4: All waris fields with prefix
-            if 'waris' in data:
-                waris_flat = self.flatten_dict(data['waris'])
-                for key, value in waris_flat.items():
-                    lines.append(f"waris_{key} :- {value}")
-            lines.append("------------------")
-
-            # Section 5: All anak fields
-            if 'anak_anak' in data and data['anak_anak']:
-                for i, child in enumerate(data['anak_anak'], 1):
-                    for key, value in child.items():
-                        lines.append(f"anak_{i}_{key} :- {value}")
+        if not include_full_data:
+            return minimal_text
+
+        if flat is None:
+            flat = self._flatten_all(data)
+
+        lines = [minimal_text, _DETAILS_FULL_SEPARATOR]
+
+        # Sections 2-4: All pemohon, pasangan and waris fields with prefix.
+        # Each block is a sized list comprehension, so the list grows once per block
+        for section in ('pemohon', 'pasangan', 'waris'):
+            if section in flat:
+                lines += [f"{section}_{key} :- {value}" for key, value in flat[section].items()]
+            lines.append(_DETAILS_SECTION_SEPARATOR)
+
+        # Section 5: All anak fields
+        for i, child in enumerate(data.get('anak_anak') or (), 1):
+            prefix = f"anak_{i}_"
+            lines += [f"{prefix}{key} :- {value}" for key, value in child.items()]
 
         return '\n'.join(lines)
 
-    def format_details_column(self, data: Dict[str, Any]) -> str:
+    def format_details_column(self, data: Dict[str, Any], flat: Optional[Dict[str, Dict[str, Any]]] = None,
+                              minimal_text: Optional[str] = None) -> str:
         """Format all data into a single multiline text column for Details"""
-        return self._format_details(data, include_full_data=True)
+        return self._format_details(data, include_full_data=True, flat=flat, minimal_text=minimal_text)
 
-    def format_minimal_details_column(self, data: Dict[str, Any]) -> str:
+    def format_minimal_details_column(self, data: Dict[str, Any], flat: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
         """Format only the first 13 numbered items for Minimal Detail column"""
-        return self._format_details(data, include_full_data=False)
-
-    def to_excel_row(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Convert structured data to flat row for Excel"""
-        row_data = {}
-
-        # Add Card Number as empty column (will be positioned after pemohon_no_mykad)
-        row_data['Card Number'] = ''
-
-        # Add Minimal Detail column with only top 13 items
-        row_data['Minimal Detail'] = self.format_minimal_details_column(data)
-
-        # Add Details column with formatted multiline text
-        row_data['Details'] = self.format_details_column(data)
-
-        # Add pemohon data with prefix
-        if 'pemohon' in data:
-            pemohon_flat = self.flatten_dict(data['pemohon'])
-            for key, value in pemohon_flat.items():
-                row_data[f'pemohon_{key}'] = value
-
-        # Add pasangan data with prefix
-        if 'pasangan' in data:
-            pasangan_flat = self.flatten_dict(data['pasangan'])
-            for key, value in pasangan_flat.items():
-                row_data[f'pasangan_{key}'] = value
-
-        # Add waris data with prefix
-        if 'waris' in data:
-            waris_flat = self.flatten_dict(data['waris'])
-            for key, value in waris_flat.items():
-                row_data[f'waris_{key}'] = value
-
-        # Add document_info data with prefix (exclude extraction_date and extraction_version)
-        if 'document_info' in data:
-            doc_flat = self.flatten_dict(data['document_info'])
-            for key, value in doc_flat.items():
-                if key not in ['extraction_date', 'extraction_version']:
-                    row_data[f'document_{key}'] = value
-
-        # Add children data with numbered columns (support up to 10 children)
-        if 'anak_anak' in data and data['anak_anak']:
-            for i, child in enumerate(data['anak_anak'][:10], 1):  # Limit to 10 children
-                for key, value in child.items():
-                    row_data[f'anak_{i}_{key}'] = value
-
-        return row_data
-
-    def to_excel_row_minimal(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        """Convert structured data to minimal flat row with only essential fields"""
-        pemohon = data.get('pemohon', {})
-        pasangan = data.get('pasangan', {})
-        waris = data.get('waris', {})
+        return self._format_details(data, include_full_data=False, flat=flat)
+
+    def to_excel_row(self, data: Dict[str, Any], include_minimal_detail: bool = True,
+                     include_details: bool = True) -> Dict[str, Any]:
+        """Convert structured data to flat row for Excel
+
+        Args:
+            data: Structured data dictionary
+            include_minimal_detail: If False, the 'Minimal Detail' text is not built
+                and its column is left out (only the everything sheet shows it)
+            include_details: If False, the 'Details' text is not built and its
+                column is left out
+        """
+        # Flatten each section once for the Details text and the prefixed columns
+        flat = self._flatten_all(data)
+
+        # Prefixed columns per section, merged into the row in one go below
+        pemohon_cols = self._prefixed_columns('pemohon', flat.get('pemohon', {}))
+        pasangan_cols = self._prefixed_columns('pasangan', flat.get('pasangan', {}))
+        waris_cols = self._prefixed_columns('waris', flat.get('waris', {}))
+
+        # document_info (exclude extraction_date and extraction_version)
+        document_info = {
+            key: value for key, value in flat.get('document_info', {}).items()
+            if key not in _DOCUMENT_EXCLUDED_KEYS
+        }
+        document_cols = self._prefixed_columns('document', document_info)
+
+        # Children with numbered columns (support up to MAX_CHILDREN children)
+        anak_cols = {}
+        for prefix, child in zip(_ANAK_PREFIXES, data.get('anak_anak') or ()):
+            anak_cols.update(self._prefixed_columns(prefix, child))
+
+        # The 13 numbered items open the Details text too, so they are formatted once
+        minimal_text = None
+        if include_minimal_detail or include_details:
+            minimal_text = self.format_minimal_details_column(data, flat)
+
+        # Minimal Detail column with only top 13 items
+        minimal_detail_cols = {'Minimal Detail': minimal_text} if include_minimal_detail else {}
+
+        # Details column with formatted multiline text
+        details_cols = {}
+        if include_details:
+            details_cols['Details'] = self.format_details_column(data, flat, minimal_text)
+
+        return {
+            # Card Number is an empty column (will be positioned after pemohon_no_mykad)
+            'Card Number': '',
+            **minimal_detail_cols,
+            **details_cols,
+            **pemohon_cols,
+            **pasangan_cols,
+            **waris_cols,
+            **document_cols,
+            **anak_cols,
+        }
+
+    def to_excel_columns(self, datas: List[Dict[str, Any]], include_minimal_detail: bool = True,
+                         include_details: bool = True) -> Dict[str, List[Any]]:
+        """Convert many records to column lists (the to_excel_row columns, column-major)
+
+        Columns appear in first-seen order; records lacking a column get None in it.
+
+        Args:
+            datas: Structured data dictionaries, one per PDF
+            include_minimal_detail: Passed through to to_excel_row
+            include_details: Passed through to to_excel_row
+
+        Returns:
+            Dict of column name to a list with one value per record
+        """
+        columns: Dict[str, List[Any]] = {}
+
+        for row_idx, data in enumerate(datas):
+            for key, value in self.to_excel_row(data, include_minimal_detail, include_details).items():
+                column = columns.get(key)
+                if column is None:
+                    column = columns[key] = [None] * row_idx
+                column.append(value)
+
+            # Pad columns this record didn't have
+            for column in columns.values():
+                if len(column) == row_idx:
+                    column.append(None)
+
+        return columns
+
+    def to_excel_row_minimal(self, data: Dict[str, Any], details: Optional[str] = None) -> Dict[str, Any]:
+        """Convert structured data to minimal flat row with only essential fields
+
+        Args:
+            data: Structured data dictionary
+            details: Optional precomputed format_details_column(data), e.g. the
+                'Details' value of to_excel_row for the same record
+        """
+        if details is None:
+            details = self.format_details_column(data)
+
+        ic, name, ph1, ph2, address, email = _get_fields(
+            data.get('pemohon', {}), _MINIMAL_PEMOHON_GETTER, _MINIMAL_PEMOHON_KEYS)
+        spouse_ic, spouse_name, spouse_ph = _get_fields(
+            data.get('pasangan', {}), _MINIMAL_PASANGAN_GETTER, _MINIMAL_PASANGAN_KEYS)
+        relation, rel_ic, rel_name, rel_ph = _get_fields(
+            data.get('waris', {}), _MINIMAL_WARIS_GETTER, _MINIMAL_WARIS_KEYS)
 
         return {
-            'IC': pemohon.get('no_mykad', ''),
+            'IC': ic,
             'Card Number': '',
-            'Details': self.format_details_column(data),
-            'NAME': pemohon.get('nama', ''),
-            'PH1': pemohon.get('telefon_bimbit', ''),
-            'PH2': pemohon.get('telefon_rumah', ''),
-            'ADDRESS': pemohon.get('alamat', ''),
-            'SPOUSE IC': pasangan.get('no_mykad', ''),
-            'SPOUSE NAME': pasangan.get('nama', ''),
-            'SPOUSE PH': pasangan.get('telefon', ''),
-            'RELATION': waris.get('hubungan', ''),
-            'REL-IC': waris.get('no_pengenalan', ''),
-            'REL-NAME': waris.get('nama', ''),
-            'REL-PH1': waris.get('telefon', ''),
-            'EMAIL': pemohon.get('email', '')
+            'Details': details,
+            'NAME': name,
+            'PH1': ph1,
+            'PH2': ph2,
+            'ADDRESS': address,
+            'SPOUSE IC': spouse_ic,
+            'SPOUSE NAME': spouse_name,
+            'SPOUSE PH': spouse_ph,
+            'RELATION': relation,
+            'REL-IC': rel_ic,
+            'REL-NAME': rel_name,
+            'REL-PH1': rel_ph,
+            'EMAIL': email
         }
 
 
@@ -4,10 +4,50 @@ Consolidates common text cleaning operations
 """
 
 import re
+import string
+from functools import lru_cache
 from typing import Optional
 from ..config.constants import GENDER_KEYWORDS, STATE_VARIATIONS
 
+# Cleaners are pure str -> str functions and batches repeat many values
+# (states, districts, banks, blank fields), so results are memoized
+_CACHE_SIZE = 2048
 
+# Precompiled patterns
+_RE_AGE = re.compile(r'(\d+\s*TAHUN)')
+# Section labels and everything after them on the line, one pattern per label
+_SECTION_LABELS = ('Pemohon', 'Pasangan', 'Waris', 'Anak')
+_RE_SECTION_LABELS = tuple(
+    re.compile(rf'\s*{label}.*$', re.IGNORECASE) for label in _SECTION_LABELS
+)
+# On single-line text the per-label passes cut at the earliest label, so one
+# fused pass gives the same result
+_RE_SECTION_LABEL = re.compile(r'\s*(?:Pemohon|Pasangan|Waris|Anak).*$', re.IGNORECASE)
+_RE_TRAILING_RM = re.compile(r'\s*RM\s*$', re.IGNORECASE)
+
+# Character-class filters use str methods instead of regexes:
+# str.isdecimal matches regex \d and str.split() splits on regex \s
+_ASCII_LETTERS = frozenset(string.ascii_letters)
+
+# One alternation per state matching any of its variations, so each state
+# scans the address once instead of once per variation
+_STATE_VARIATION_RES = tuple(
+    (state_key, re.compile('|'.join(map(re.escape, variations))))
+    for state_key, variations in STATE_VARIATIONS.items()
+)
+
+
+def _digits(text: str) -> str:
+    """Keep only decimal digits"""
+    return ''.join(filter(str.isdecimal, text))
+
+
+def _letters_and_spaces(text: str) -> str:
+    """Keep only ASCII letters and whitespace"""
+    return ''.join(ch for ch in text if ch in _ASCII_LETTERS or ch.isspace())
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
 def clean_age_field(age_text: str) -> str:
     """Clean age field by removing text after TAHUN
 
@@ -20,13 +60,14 @@ def clean_age_field(age_text: str) -> str:
     if not age_text:
         return ""
 
-    match = re.search(r'(\d+\s*TAHUN)', age_text.upper())
+    match = _RE_AGE.search(age_text.upper())
     if match:
         return match.group(1)
 
     return age_text
 
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def remove_section_labels(text: str) -> str:
     """Remove section labels like 'Pemohon', 'Pasangan', 'Waris' from text
 
@@ -41,15 +82,22 @@ def remove_section_labels(text: str) -> str:
 
     # Remove section labels (case-insensitive)
     # for label in ['Pemohon', 'Pasangan', 'Waris', 'Anak', 'Maklumat']:
-    for label in ['Pemohon', 'Pasangan', 'Waris', 'Anak']:
-        text = re.sub(rf'\s*{label}.*$', '', text, flags=re.IGNORECASE)
-
-    # Clean up extra whitespace and commas
-    text = text.strip().rstrip(',').strip()
+    if '\n' in text:
+        # '.' stops at newlines, so an earlier label's pass can remove the newline
+        # that blocks a later one; keep the ordered per-label passes here
+        for label_re in _RE_SECTION_LABELS:
+            text = label_re.sub('', text)
+    else:
+        text = _RE_SECTION_LABEL.sub('', text, count=1)
+
+    # Clean up extra whitespace and commas (the left end is already stripped
+    # once, so only the right end needs the second strip)
+    text = text.strip().rstrip(',').rstrip()
 
     return text
 
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def extract_postal_code(postal_text: str) -> str:
     """Extract only numbers from postal code field
 
@@ -62,9 +110,10 @@ def extract_postal_code(postal_text: str) -> str:
     if not postal_text:
         return ""
 
-    return re.sub(r'[^\d]', '', postal_text)
+    return _digits(postal_text)
 
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def remove_numbers(text: str) -> str:
     """Remove all numbers from text
 
@@ -77,10 +126,23 @@ def remove_numbers(text: str) -> str:
     if not text:
         return ""
 
-    no_numbers = re.sub(r'\d+', '', text)
-    return ' '.join(no_numbers.split()).strip()
-
-
+    # Drop digits and collapse whitespace in one pass
+    out = []
+    prev_space = True
+    for ch in text:
+        if ch.isdecimal():
+            continue
+        if ch.isspace():
+            if not prev_space:
+                out.append(' ')
+                prev_space = True
+        else:
+            out.append(ch)
+            prev_space = False
+    return ''.join(out).rstrip()
+
+
+@lru_cache(maxsize=_CACHE_SIZE)
 def remove_whitespace(text: str) -> str:
     """Remove all whitespace from text
 
@@ -93,9 +155,10 @@ def remove_whitespace(text: str) -> str:
     if not text:
         return ""
 
-    return re.sub(r'\s+', '', text)
+    return ''.join(text.split())
 
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def remove_trailing_rm(text: str) -> str:
     """Remove trailing 'RM' from text
 
@@ -108,10 +171,11 @@ def remove_trailing_rm(text: str) -> str:
     if not text:
         return ""
 
-    cleaned = re.sub(r'\s*RM\s*$', '', text, flags=re.IGNORECASE)
+    cleaned = _RE_TRAILING_RM.sub('', text)
     return cleaned.strip()
 
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def extract_numbers_only(text: str) -> str:
     """Extract only numeric digits from text
 
@@ -124,9 +188,10 @@ def extract_numbers_only(text: str) -> str:
     if not text:
         return ""
 
-    return re.sub(r'[^\d]', '', text)
+    return _digits(text)
 
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def clean_jantina_field(jantina_text: str) -> str:
     """Extract only the gender word (LELAKI or PEREMPUAN) from jantina field
 
@@ -139,6 +204,11 @@ def clean_jantina_field(jantina_text: str) -> str:
     if not jantina_text:
         return ""
 
+    # Fast path for already-uppercase text: PEREMPUAN wins over LELAKI below,
+    # so finding it in the raw text settles the result without upper()
+    if 'PEREMPUAN' in jantina_text:
+        return GENDER_KEYWORDS['PEREMPUAN']
+
     text_upper = jantina_text.upper()
 
     # Check for known gender keywords
@@ -148,10 +218,11 @@ def clean_jantina_field(jantina_text: str) -> str:
         return GENDER_KEYWORDS['LELAKI']
 
     # Fallback: remove numbers and return cleaned text
-    letters_only = re.sub(r'[^a-zA-Z\s]', '', jantina_text)
+    letters_only = _letters_and_spaces(jantina_text)
     return ' '.join(letters_only.split()).strip()
 
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def extract_alphabets_only(text: str) -> str:
     """Keep only alphabetic characters and spaces
 
@@ -164,10 +235,20 @@ def extract_alphabets_only(text: str) -> str:
     if not text:
         return ""
 
-    letters_only = re.sub(r'[^a-zA-Z\s]', '', text)
-    return ' '.join(letters_only.split()).strip()
+    # Keep letters and collapse whitespace in one pass
+    out = []
+    prev_space = True
+    for ch in text:
+        if ch in _ASCII_LETTERS:
+            out.append(ch)
+            prev_space = False
+        elif ch.isspace() and not prev_space:
+            out.append(' ')
+            prev_space = True
+    return ''.join(out).rstrip()
 
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def clean_mykad_number(mykad_text: str) -> str:
     """Clean MyKad number - keep only first 12 digits before whitespace
 
@@ -180,19 +261,21 @@ def clean_mykad_number(mykad_text: str) -> str:
     if not mykad_text:
         return ""
 
-    # Remove everything after whitespace
-    text_before_space = mykad_text.split()[0] if mykad_text.split() else mykad_text
-
-    # Extract only digits
-    digits_only = re.sub(r'[^\d]', '', text_before_space)
-
-    # Keep only first 12 digits
-    if len(digits_only) >= 12:
-        return digits_only[:12]
+    # Single pass over the first whitespace-separated token, keeping its digits
+    # and stopping as soon as 12 have been collected
+    digits = []
+    for ch in mykad_text.lstrip():
+        if ch.isspace():
+            break
+        if ch.isdecimal():
+            digits.append(ch)
+            if len(digits) == 12:
+                break
 
-    return digits_only
+    return ''.join(digits)
 
 
+@lru_cache(maxsize=_CACHE_SIZE)
 def is_state_in_address(state: str, address: str) -> bool:
     """Check if a state (or its variations) is already in the address
 
@@ -206,22 +289,23 @@ def is_state_in_address(state: str, address: str) -> bool:
     if not state or not address:
         return False
 
-    state_normalized = ' '.join(state.upper().split())
-    address_upper = ' '.join(address.upper().split())
+    # Split once; the word lists give both the normalized strings and the overlap sets
+    state_words = state.upper().split()
+    address_words = address.upper().split()
+    state_normalized = ' '.join(state_words)
+    address_upper = ' '.join(address_words)
 
     # Direct match
     if state_normalized in address_upper:
         return True
 
     # Check variations
-    for state_key, variations in STATE_VARIATIONS.items():
-        if any(keyword in state_normalized for keyword in [state_key]):
-            if any(var in address_upper for var in variations):
-                return True
+    for state_key, variations_re in _STATE_VARIATION_RES:
+        if state_key in state_normalized and variations_re.search(address_upper):
+            return True
 
     # Check word overlap
-    state_words = set(state_normalized.split())
-    address_words = set(address_upper.split())
-    overlap = len(state_words & address_words)
+    state_word_set = set(state_words)
+    overlap = len(state_word_set.intersection(address_words))
 
-    return overlap >= len(state_words) * 0.5
+    return overlap >= len(state_word_set) * 0.5
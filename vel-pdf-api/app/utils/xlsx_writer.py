@@ -0,0 +1,140 @@
+"""
+Minimal streaming XLSX writer
+Writes a single unstyled worksheet directly as SpreadsheetML inside the XLSX zip
+"""
+
+import math
+import re
+import zipfile
+from itertools import chain
+from typing import Any, Iterable, List, Sequence
+from xml.sax.saxutils import escape, quoteattr
+
+# Control characters that are not allowed in XML 1.0 documents
+_ILLEGAL_XML_CHARS_RE = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+# Flush the sheet XML to the zip stream in ~1 MB chunks
+_FLUSH_SIZE = 1024 * 1024
+
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_DOC_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+_CONTENT_TYPES_XML = (
+    _XML_HEADER
+    + '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS_XML = (
+    _XML_HEADER
+    + f'<Relationships xmlns="{_PKG_REL_NS}">'
+    f'<Relationship Id="rId1" Type="{_DOC_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK_RELS_XML = (
+    _XML_HEADER
+    + f'<Relationships xmlns="{_PKG_REL_NS}">'
+    f'<Relationship Id="rId1" Type="{_DOC_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+    f'<Relationship Id="rId2" Type="{_DOC_REL_NS}/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+_STYLES_XML = (
+    _XML_HEADER
+    + f'<styleSheet xmlns="{_MAIN_NS}">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def _column_letter(index: int) -> str:
+    """Convert a 0-based column index to Excel letters (0 -> A, 26 -> AA)"""
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _cell_xml(ref: str, value: Any) -> str:
+    """Render a single cell, or an empty string for blank values"""
+    if value is None or value == '':
+        return ''
+
+    if isinstance(value, bool):
+        return f'<c r="{ref}" t="b"><v>{int(value)}</v></c>'
+
+    if isinstance(value, (int, float)) and math.isfinite(value):
+        return f'<c r="{ref}"><v>{value!r}</v></c>'
+
+    text = _ILLEGAL_XML_CHARS_RE.sub('', escape(str(value)))
+    return f'<c r="{ref}" t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+def write_xlsx(output_path: str, sheet_name: str, header: Sequence[str],
+               rows: Iterable[Sequence[Any]]) -> None:
+    """Write a header row plus data rows to a single-sheet XLSX file
+
+    Cells are written as inline strings (no shared-string table), booleans and
+    numbers; None and empty strings are left as empty cells.
+
+    Args:
+        output_path: Destination .xlsx path
+        sheet_name: Worksheet name
+        header: Column names for the first row
+        rows: Iterable of row value sequences, in header order
+    """
+    columns: List[str] = [_column_letter(i) for i in range(len(header))]
+    workbook_xml = (
+        _XML_HEADER
+        + f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_DOC_REL_NS}"><sheets>'
+        f'<sheet name={quoteattr(sheet_name)} sheetId="1" r:id="rId1"/>'
+        '</sheets></workbook>'
+    )
+
+    with zipfile.ZipFile(output_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES_XML)
+        zf.writestr('_rels/.rels', _ROOT_RELS_XML)
+        zf.writestr('xl/workbook.xml', workbook_xml)
+        zf.writestr('xl/_rels/workbook.xml.rels', _WORKBOOK_RELS_XML)
+        zf.writestr('xl/styles.xml', _STYLES_XML)
+
+        with zf.open('xl/worksheets/sheet1.xml', 'w') as sheet:
+            chunks = [_XML_HEADER, f'<worksheet xmlns="{_MAIN_NS}"><sheetData>']
+            pending = 0
+
+            for row_number, row in enumerate(chain((header,), rows), 1):
+                cells = ''.join(
+                    _cell_xml(f'{column}{row_number}', value)
+                    for column, value in zip(columns, row)
+                )
+                line = f'<row r="{row_number}">{cells}</row>'
+                chunks.append(line)
+                pending += len(line)
+
+                if pending >= _FLUSH_SIZE:
+                    sheet.write(''.join(chunks).encode('utf-8'))
+                    chunks.clear()
+                    pending = 0
+
+            chunks.append('</sheetData></worksheet>')
+            sheet.write(''.join(chunks).encode('utf-8'))
+
@@ -0,0 +1,85 @@
+"""
+Regression tests for v2 border detection
+
+Run from vel-pdf-api with: python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config.constants import V2_OFFSET_X, V2_OFFSET_Y
+from app.pdf_cropper import detect_v2_border
+
+PAGE_WIDTH = 612
+PAGE_HEIGHT = 792
+
+
+def write_pdf(path, content):
+    """Write a single Letter-size page whose content stream is `content`"""
+    stream = content.encode('latin-1')
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+        f"/Contents 4 0 R >>".encode(),
+        b"<< /Length " + str(len(stream)).encode() + b" >>\nstream\n" + stream + b"\nendstream",
+    ]
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        out += f"{offset:010d} 00000 n \n".encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def border_content(line_width, shift=0.0):
+    """Stroke a v2-style frame V2_OFFSET inside the page edges"""
+    x = V2_OFFSET_X + shift
+    y = V2_OFFSET_Y + shift
+    return f"{line_width} w {x} {y} {PAGE_WIDTH - 2 * x} {PAGE_HEIGHT - 2 * y} re S"
+
+
+class DetectV2BorderTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.pdf_path = os.path.join(self.tmp_dir.name, 'page.pdf')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_thin_border_detected(self):
+        # Thin frames off the pixel grid render as anti-aliased gray lines
+        for line_width in (0.5, 1):
+            for shift in (0.3, 0.7):
+                with self.subTest(line_width=line_width, shift=shift):
+                    write_pdf(self.pdf_path, border_content(line_width, shift))
+                    self.assertTrue(detect_v2_border(self.pdf_path))
+
+    def test_thick_border_detected(self):
+        write_pdf(self.pdf_path, border_content(2))
+        self.assertTrue(detect_v2_border(self.pdf_path))
+
+    def test_no_border(self):
+        # A table-like box well inside the page is not a v2 border
+        write_pdf(self.pdf_path, "1 w 100 100 300 200 re S")
+        self.assertFalse(detect_v2_border(self.pdf_path))
+
+    def test_missing_file(self):
+        self.assertFalse(detect_v2_border(os.path.join(self.tmp_dir.name, 'missing.pdf')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -84,24 +84,14 @@ export default function Home() {
         logger.log(`Progress: ${message.current}/${message.total} (${message.current && message.total ? Math.round((message.current / message.total) * 100) : 0}%)`)
         setProgress(message)
 
-        // Update file statuses in real-time
-        if (message.current > 0) {
+        // Update file statuses in real-time. Files finish out of order, so the
+        // row comes from file_index; current is only the completed count
+        if (message.file_index !== undefined && message.item_status) {
+          const fileIndex = message.file_index
+          const itemStatus = message.item_status
           setFileStatuses((prev) => {
             const newStatuses = new Map(prev)
-            const currentIndex = message.current - 1
-
-            // Mark previous files as success if not already marked as error
-            for (let i = 0; i < currentIndex; i++) {
-              if (newStatuses.get(i) !== 'error') {
-                newStatuses.set(i, 'success')
-              }
-            }
-
-            // Update current file status
-            if (message.item_status) {
-              newStatuses.set(currentIndex, message.item_status)
-            }
-
+            newStatuses.set(fileIndex, itemStatus)
             return newStatuses
           })
         }
@@ -353,6 +343,7 @@ export default function Home() {
                   message={progress.message}
                   elapsedTime={progress.elapsed_time}
                   itemStatus={progress.item_status}
+                  fileStatuses={fileStatuses}
                   successCount={progress.success_count}
                   failedCount={progress.failed_count}
                   failedFiles={progress.failed_files}
@@ -368,7 +359,6 @@ export default function Home() {
               <FileListPanel
                 files={files}
                 onRemoveFile={handleRemoveFile}
-                currentProcessingIndex={progress.current - 1}
                 fileStatuses={fileStatuses}
                 disabled={isUploading || progress.status === "processing"}
               />
@@ -15,6 +15,7 @@ interface ProgressDisplayProps {
   message: string
   elapsedTime?: number
   itemStatus?: ItemStatus
+  fileStatuses?: Map<number, 'pending' | 'processing' | 'success' | 'error'>
   successCount?: number
   failedCount?: number
   failedFiles?: Array<{
@@ -33,6 +34,7 @@ export function ProgressDisplay({
   message,
   elapsedTime,
   itemStatus,
+  fileStatuses,
   successCount,
   failedCount,
   failedFiles,
@@ -68,6 +70,8 @@ export function ProgressDisplay({
   }
 
   const getItemStatus = (index: number) => {
+    // Files finish out of order; per-file statuses (keyed by 0-based index) win when known
+    if (fileStatuses) return fileStatuses.get(index - 1) || "pending"
     if (index < current) return "success"
     if (index === current) return itemStatus || "processing"
     return "pending"
@@ -18,6 +18,7 @@ export interface ProgressMessage {
   status: ProgressStatus
   message: string
   item_status?: ItemStatus
+  file_index?: number
   elapsed_time?: number
   success_count?: number
   failed_count?: number